@@ -1,9 +1,25 @@
 """pi = 4/1 - 4/3 + 4/5 - 4/7 + 4/9 - 4/11 ..."""
 
+import json
+import os
+import tempfile
 import unittest
+from concurrent.futures import ProcessPoolExecutor
 from itertools import cycle
+from math import fsum, isqrt
+from typing import List, Optional, Tuple
 import timeit
 
+CHUNK_SIZE = 1_000_000
+
+# Chudnovsky series constants, every term adds about 14.18 digits
+C3_OVER_24 = 640_320 ** 3 // 24
+DIGITS_PER_TERM = 14.181647462725477
+# extra digits computed so the truncated result is correct
+GUARD_DIGITS = 10
+
+Split = Tuple[int, int, int]
+
 
 def calculate_pi_1(n_terms: int) -> float:
     return sum(4 / i * s for i, s in zip(range(1, n_terms, 2), cycle([1, -1])))
@@ -15,6 +31,146 @@ def calculate_pi_2(n_terms: int) -> float:
     )
 
 
+def _partial_sum(bounds: Tuple[int, int]) -> float:
+    """
+    Sum of the series terms with denominators in [start, stop).
+    start is always 1 mod 4, so each +4/i is paired with the following
+    -4/(i + 2) as 8 / (i * (i + 2)), which halves the number of terms
+    and removes the cancellation between neighbours.
+    fsum keeps the chunk exactly rounded however long it is.
+    """
+    start, stop = bounds
+    total = fsum(8 / (i * (i + 2)) for i in range(start, stop - 2, 4))
+    # odd number of terms, the last +4/i has no pair
+    n_odd = len(range(start, stop, 2))
+    if n_odd % 2:
+        total += 4 / (start + 2 * (n_odd - 1))
+    return total
+
+
+def _chunks(n_terms: int, chunk_size: int) -> List[Tuple[int, int]]:
+    # chunk_size is rounded to a multiple of 4 so every chunk starts at 1 mod 4
+    step = max(4, chunk_size - chunk_size % 4)
+    return [(i, min(i + step, n_terms)) for i in range(1, n_terms, step)]
+
+
+def calculate_pi_3(
+    n_terms: int, chunk_size: int = CHUNK_SIZE, workers: Optional[int] = None
+) -> float:
+    """
+    Same series as calculate_pi_1/2 computed in chunks spread over a
+    process pool. Chunk sums are combined with fsum, so very long runs
+    don't accumulate rounding error.
+    """
+    chunks = _chunks(n_terms, chunk_size)
+    if len(chunks) < 2 or workers == 1:
+        return fsum(map(_partial_sum, chunks))
+    with ProcessPoolExecutor(workers) as executor:
+        return fsum(executor.map(_partial_sum, chunks))
+
+
+def terms_per_second(seconds: float, n_terms: int, number: int = 1) -> float:
+    """Number of series terms processed per second."""
+    # only odd denominators below n_terms are terms of the series
+    return n_terms // 2 * number / seconds
+
+
+def _binary_split(a: int, b: int) -> Split:
+    """P, Q and T of the Chudnovsky series terms in [a, b)."""
+    if b - a == 1:
+        if a == 0:
+            p = q = 1
+        else:
+            p = (6 * a - 5) * (2 * a - 1) * (6 * a - 1)
+            q = a * a * a * C3_OVER_24
+        t = p * (13_591_409 + 545_140_134 * a)
+        return p, q, -t if a % 2 else t
+    m = (a + b) // 2
+    p1, q1, t1 = _binary_split(a, m)
+    p2, q2, t2 = _binary_split(m, b)
+    return p1 * p2, q1 * q2, t1 * q2 + p1 * t2
+
+
+def _int_to_str(n: int) -> str:
+    """
+    str(n) for huge n. Splits the number in halves by powers of 10,
+    which is faster than str() and isn't limited by sys.get_int_max_str_digits.
+    """
+    if n < 10 ** 1000:
+        return str(n)
+    half = (len(hex(n)) * 4 * 3 // 10) // 2  # ~ half of the decimal digits
+    high, low = divmod(n, 10 ** half)
+    return _int_to_str(high) + _int_to_str(low).zfill(half)
+
+
+class PiDigits:
+    """
+    Digits of pi computed with the Chudnovsky series and binary splitting.
+    The series state (number of terms, P, Q, T) and the longest computed
+    digit string are kept in cache_path, so a later request for fewer
+    digits is a slice of the cache and a request for more digits only
+    computes the missing terms.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None) -> None:
+        self.cache_path = cache_path
+        self._terms = 0
+        self._split: Split = (1, 1, 0)
+        self._digits = ""
+        if cache_path is not None and os.path.exists(cache_path):
+            self._load()
+
+    def _load(self) -> None:
+        with open(self.cache_path) as f:
+            data = json.load(f)
+        self._terms = data["terms"]
+        self._split = (int(data["p"], 16), int(data["q"], 16), int(data["t"], 16))
+        self._digits = data["digits"]
+
+    def _save(self) -> None:
+        p, q, t = self._split
+        data = {"terms": self._terms, "p": hex(p), "q": hex(q), "t": hex(t)}
+        data["digits"] = self._digits
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        # write to a temporary file first, so the cache is never half written
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def _extend(self, terms: int) -> None:
+        """Adds terms [self._terms, terms) to the series state."""
+        p2, q2, t2 = _binary_split(self._terms, terms)
+        if self._terms == 0:
+            self._split = (p2, q2, t2)
+        else:
+            p1, q1, t1 = self._split
+            self._split = (p1 * p2, q1 * q2, t1 * q2 + p1 * t2)
+        self._terms = terms
+
+    def digits(self, n_digits: int) -> str:
+        """Returns pi with n_digits after the decimal point, e.g. 3.14 for 2."""
+        if n_digits < len(self._digits):
+            return f"3.{self._digits[1 : n_digits + 1]}"
+
+        precision = n_digits + GUARD_DIGITS
+        terms = int(precision / DIGITS_PER_TERM) + 1
+        if self._terms < terms:
+            self._extend(terms)
+        _, q, t = self._split
+        one = 10 ** precision
+        sqrt_c = isqrt(10_005 * one * one)
+        self._digits = _int_to_str(426_880 * sqrt_c * q // t)[: n_digits + 1]
+        if self.cache_path is not None:
+            self._save()
+        return f"3.{self._digits[1:]}"
+
+
+def pi_digits(n_digits: int, cache_path: Optional[str] = None) -> str:
+    """Returns pi with n_digits after the decimal point."""
+    return PiDigits(cache_path).digits(n_digits)
+
+
 class Tests(unittest.TestCase):
     def test_1(self):
         result = calculate_pi_1(200)
@@ -24,9 +180,56 @@ class Tests(unittest.TestCase):
         result = calculate_pi_2(200)
         self.assertAlmostEqual(result, 3.14, 1)
 
+    def test_3(self):
+        result = calculate_pi_3(200)
+        self.assertAlmostEqual(result, 3.14, 1)
+
+    def test_3_same_as_1(self):
+        for n_terms in [1, 2, 3, 4, 5, 6, 7, 8, 199, 200, 201, 202, 1_001]:
+            with self.subTest(n_terms=n_terms):
+                self.assertAlmostEqual(
+                    calculate_pi_3(n_terms, chunk_size=8, workers=1),
+                    calculate_pi_1(n_terms),
+                )
+
+    def test_3_process_pool(self):
+        expected = calculate_pi_3(10_000, workers=1)
+        result = calculate_pi_3(10_000, chunk_size=1_000, workers=2)
+        self.assertAlmostEqual(result, expected, places=12)
+
+    def test_pi_digits(self):
+        self.assertEqual(pi_digits(0), "3.")
+        self.assertEqual(pi_digits(10), "3.1415926535")
+        self.assertEqual(
+            pi_digits(50), "3.14159265358979323846264338327950288419716939937510"
+        )
+
+    def test_pi_digits_long(self):
+        # digits 991-1000 of pi
+        self.assertEqual(pi_digits(1_000)[-10:], "2164201989")
+        self.assertEqual(pi_digits(20_000)[:1_002], pi_digits(1_000))
+
+    def test_pi_digits_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "pi.json")
+            expected = pi_digits(3_000)
+            self.assertEqual(pi_digits(1_000, path), expected[:1_002])
+            self.assertEqual(pi_digits(500, path), expected[:502])
+            cached = PiDigits(path)
+            self.assertEqual(cached._terms, int(1_010 / DIGITS_PER_TERM) + 1)
+            self.assertEqual(cached.digits(3_000), expected)
+            self.assertEqual(PiDigits(path)._digits, expected[0] + expected[2:])
+
 
 if __name__ == "__main__":
-    for f in [calculate_pi_1, calculate_pi_2]:
+    for f in [calculate_pi_1, calculate_pi_2, calculate_pi_3]:
         t = timeit.timeit(stmt="f(1_000)", number=10, globals=globals())
         print(f"{f.__name__} took: {t:.6f}")
+    n = 20_000_000
+    for f in [calculate_pi_1, calculate_pi_2, calculate_pi_3]:
+        t = timeit.timeit(stmt="f(n)", number=1, globals=globals())
+        print(f"{f.__name__}({n:_}) {terms_per_second(t, n):,.0f} terms/s")
+    for n in [1_000, 10_000, 100_000]:
+        t = timeit.timeit(stmt="pi_digits(n)", number=1, globals=globals())
+        print(f"pi_digits({n:_}) took: {t:.6f}")
     unittest.main()
@@ -1,7 +1,8 @@
 """Generating Fibonacci numbers with a generator"""
 
 import unittest
-from typing import Iterator
+from itertools import islice
+from typing import Iterator, NamedTuple, Optional
 
 
 def fib(n: int) -> Iterator[int]:
@@ -15,6 +16,58 @@ def fib(n: int) -> Iterator[int]:
     yield b
 
 
+class FibState(NamedTuple):
+    """Checkpoint of a Fibonacci stream, a = F(n) and b = F(n + 1)"""
+
+    n: int
+    a: int
+    b: int
+
+
+class FibRange:
+    """
+    Lazily yields F(start), F(start + 1), ... F(stop - 1).
+    Jumping to start takes O(log start) steps, every next term is one addition.
+    Without stop the stream never ends.
+    """
+
+    def __init__(self, start: int = 0, stop: Optional[int] = None) -> None:
+        if start < 0:
+            raise ValueError("start must be non-negative")
+        # imported here, fib7 imports this module for its benchmark
+        from fib7 import fib_pair
+
+        a, b = fib_pair(start)
+        self._state = FibState(start, a, b)
+        self.stop = stop
+
+    @classmethod
+    def resume(cls, state: FibState, stop: Optional[int] = None) -> "FibRange":
+        """Continues a stream from a checkpoint() without any recomputation"""
+        fib_range = cls.__new__(cls)
+        fib_range._state = state
+        fib_range.stop = stop
+        return fib_range
+
+    def checkpoint(self) -> FibState:
+        """State of the stream, the next yielded value is F(state.n)"""
+        return self._state
+
+    def __iter__(self) -> Iterator[int]:
+        return self
+
+    def __next__(self) -> int:
+        n, a, b = self._state
+        if self.stop is not None and self.stop <= n:
+            raise StopIteration
+        self._state = FibState(n + 1, b, a + b)
+        return a
+
+
+def fib_range(start: int, stop: Optional[int] = None) -> FibRange:
+    return FibRange(start, stop)
+
+
 class Test(unittest.TestCase):
     def test_1(self):
         self.assertEqual(next(fib(1)), 1)
@@ -25,6 +78,28 @@ class Test(unittest.TestCase):
     def test_10(self):
         self.assertEqual(next(fib(50)), 12_586_269_025)
 
+    def test_range(self):
+        expected = [next(fib(n)) for n in range(40, 60)]
+        self.assertListEqual(list(fib_range(40, 60)), expected)
+
+    def test_range_from_zero(self):
+        self.assertListEqual(list(fib_range(0, 8)), [0, 1, 1, 2, 3, 5, 8, 13])
+
+    def test_empty_range(self):
+        self.assertListEqual(list(fib_range(10, 10)), [])
+
+    def test_endless_range(self):
+        self.assertListEqual(list(islice(fib_range(10), 3)), [55, 89, 144])
+
+    def test_resume(self):
+        stream = fib_range(1_000, 2_000)
+        first = list(islice(stream, 500))
+        state = stream.checkpoint()
+        self.assertEqual(state.n, 1_500)
+        rest = list(FibRange.resume(state, 2_000))
+        self.assertListEqual(first + rest, list(fib_range(1_000, 2_000)))
+        self.assertEqual(rest[-1], next(fib(1_999)))
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
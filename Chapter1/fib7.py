@@ -0,0 +1,130 @@
+"""Fibonacci numbers in O(log n) steps with fast doubling
+
+F(2k) = F(k) * (2 * F(k + 1) - F(k))
+F(2k + 1) = F(k) ** 2 + F(k + 1) ** 2
+"""
+
+import unittest
+import timeit
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from typing import Callable, Dict, Optional, Tuple
+
+import fib2
+import fib3
+import fib4
+import fib5
+import fib6
+
+# a benchmarked function is no longer usable once a single call takes longer
+TIME_LIMIT = 5.0
+SIZES = [10, 20, 30, 50, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def fib_pair(n: int, m: Optional[int] = None) -> Tuple[int, int]:
+    """Returns (F(n), F(n + 1)), reduced modulo m if m is given."""
+    a: int = 0  # F(k)
+    b: int = 1  # F(k + 1)
+    # walk the bits of n from the most significant one, k doubles every step
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a)  # F(2k)
+        d = a * a + b * b  # F(2k + 1)
+        if bit == "1":
+            c, d = d, c + d
+        if m is not None:
+            c, d = c % m, d % m
+        a, b = c, d
+    return a, b
+
+
+def fib(n: int) -> int:
+    if n < 0:
+        raise ValueError("n must be non-negative")
+    return fib_pair(n)[0]
+
+
+def fib_mod(n: int, m: int) -> int:
+    """F(n) % m without ever building F(n)"""
+    if n < 0:
+        raise ValueError("n must be non-negative")
+    if m < 1:
+        raise ValueError("m must be positive")
+    return fib_pair(n, m)[0]
+
+
+def _fib6(n: int) -> int:
+    return next(fib6.fib(n))
+
+
+def _timed(f: Callable[[int], int], n: int, conn: Connection) -> None:
+    try:
+        conn.send(timeit.timeit(lambda: f(n), number=1))
+    except RecursionError:
+        conn.send(None)
+
+
+def benchmark(functions: Dict[str, Callable[[int], int]]) -> None:
+    """
+    Runs every function over increasing n and shows where each one stops
+    being usable, because it's too slow or fails with RecursionError.
+    Every call runs in its own process, so it can be stopped after TIME_LIMIT.
+    """
+    for name, f in functions.items():
+        for n in SIZES:
+            receiver, sender = Pipe(duplex=False)
+            process = Process(target=_timed, args=(f, n, sender))
+            process.start()
+            if not receiver.poll(TIME_LIMIT):
+                process.terminate()
+                process.join()
+                print(f"{name}: slower than {TIME_LIMIT}s at n={n:_}")
+                break
+            t = receiver.recv()
+            process.join()
+            if t is None:
+                print(f"{name}: RecursionError at n={n:_}")
+                break
+            print(f"{name}(n={n:_}) took: {t:.6f}")
+
+
+class Test(unittest.TestCase):
+    def test_1(self):
+        self.assertEqual(fib(1), 1)
+
+    def test_2(self):
+        self.assertEqual(fib(2), 1)
+
+    def test_10(self):
+        self.assertEqual(fib(50), 12_586_269_025)
+
+    def test_small(self):
+        expected = [fib5.fib(n) for n in range(1000)]
+        self.assertListEqual([fib(n) for n in range(1000)], expected)
+
+    def test_negative(self):
+        with self.assertRaises(ValueError):
+            fib(-1)
+
+    def test_mod(self):
+        for m in [1, 2, 10, 1_000_000_007]:
+            for n in [0, 1, 2, 3, 50, 999, 1000]:
+                with self.subTest(n=n, m=m):
+                    self.assertEqual(fib_mod(n, m), fib5.fib(n) % m)
+
+    def test_mod_huge_n(self):
+        # Pisano period of 10 is 60
+        self.assertEqual(fib_mod(10 ** 100, 10), fib_mod(10 ** 100 % 60, 10))
+
+
+if __name__ == "__main__":
+    benchmark(
+        {
+            "fib2": fib2.fib,
+            "fib3": fib3.fib,
+            "fib4": fib4.fib,
+            "fib5": fib5.fib,
+            "fib6": _fib6,
+            "fib7": fib,
+        }
+    )
+    unittest.main(verbosity=2)
@@ -0,0 +1,156 @@
+"""Bounded, thread-safe Fibonacci memo table
+
+fib3 and fib4 keep every computed value forever and fill the memo
+recursively, so a cold call for large n raises RecursionError.
+FibMemo is filled iteratively and evicts least recently used values
+once the stored numbers take more than max_bytes.
+"""
+
+import unittest
+from collections import OrderedDict
+from sys import getsizeof
+from threading import Lock, Thread
+from typing import List, NamedTuple
+
+from fib7 import fib_pair
+
+MAX_BYTES = 64 * 1024 * 1024
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    currsize: int
+    currbytes: int
+    maxbytes: int
+
+
+class FibMemo:
+    def __init__(self, max_bytes: int = MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._memo: "OrderedDict[int, int]" = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __call__(self, n: int) -> int:
+        if n < 0:
+            raise ValueError("n must be non-negative")
+        with self._lock:
+            if n in self._memo:
+                self._hits += 1
+                self._memo.move_to_end(n)
+                return self._memo[n]
+            self._misses += 1
+            # sequential queries only need one addition
+            previous = self._memo.get(n - 1)
+            before_previous = self._memo.get(n - 2)
+        if previous is not None and before_previous is not None:
+            value = previous + before_previous
+        else:
+            # iterative fast doubling, no recursion however big n is
+            value = fib_pair(n)[0]
+        with self._lock:
+            self._store(n, value)
+        return value
+
+    def _store(self, n: int, value: int) -> None:
+        """Adds value to the memo and evicts the oldest ones above max_bytes"""
+        size = getsizeof(value)
+        if self.max_bytes < size or n in self._memo:
+            return
+        self._memo[n] = value
+        self._bytes += size
+        while self.max_bytes < self._bytes:
+            _, evicted = self._memo.popitem(last=False)
+            self._bytes -= getsizeof(evicted)
+            self._evictions += 1
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                self._hits,
+                self._misses,
+                self._evictions,
+                len(self._memo),
+                self._bytes,
+                self.max_bytes,
+            )
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._memo.clear()
+            self._bytes = 0
+            self._hits = self._misses = self._evictions = 0
+
+
+fib = FibMemo()
+
+
+class Test(unittest.TestCase):
+    def test_1(self):
+        self.assertEqual(fib(1), 1)
+
+    def test_2(self):
+        self.assertEqual(fib(2), 1)
+
+    def test_10(self):
+        self.assertEqual(fib(50), 12_586_269_025)
+
+    def test_no_recursion_error(self):
+        self.assertEqual(FibMemo()(100_000), fib_pair(100_000)[0])
+
+    def test_sequential(self):
+        memo = FibMemo()
+        self.assertListEqual(
+            [memo(n) for n in range(100)], [fib_pair(n)[0] for n in range(100)]
+        )
+
+    def test_cache_info(self):
+        memo = FibMemo()
+        memo(10)
+        memo(10)
+        memo(11)
+        info = memo.cache_info()
+        self.assertEqual((info.hits, info.misses, info.evictions), (1, 2, 0))
+        self.assertEqual(info.currsize, 2)
+
+    def test_bounded(self):
+        memo = FibMemo(max_bytes=1_000)
+        for n in range(1_000):
+            memo(n)
+        info = memo.cache_info()
+        self.assertLessEqual(info.currbytes, 1_000)
+        self.assertLess(0, info.evictions)
+        self.assertEqual(info.currsize + info.evictions, 1_000)
+
+    def test_too_big_to_store(self):
+        memo = FibMemo(max_bytes=100)
+        memo(10_000)
+        self.assertEqual(memo.cache_info().currsize, 0)
+
+    def test_threads(self):
+        memo = FibMemo(max_bytes=10_000)
+        results: List[List[int]] = []
+
+        def worker():
+            results.append([memo(n) for n in range(500)])
+
+        threads = [Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        expected = [fib_pair(n)[0] for n in range(500)]
+        for result in results:
+            self.assertListEqual(result, expected)
+        info = memo.cache_info()
+        self.assertEqual(info.hits + info.misses, 8 * 500)
+        self.assertLessEqual(info.currbytes, 10_000)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
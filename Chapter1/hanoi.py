@@ -14,10 +14,34 @@ following constraints:
 • A wider disc can never be atop a narrower disc.
 """
 
+from functools import lru_cache
 from queue import LifoQueue
+from typing import Iterator, List, NamedTuple, Tuple
+import timeit
 import unittest
 
 NUMBER_OF_DISCS = 20
+# a solver is dropped from the benchmark once a single run takes longer
+TIME_LIMIT = 10.0
+
+# pegs are numbered in the order of hanoi() arguments
+FROM_PEG, TO_PEG, OTHER_PEG = 0, 1, 2
+
+
+class Move(NamedTuple):
+    disc: int
+    from_peg: int
+    to_peg: int
+
+
+class SplitTable(NamedTuple):
+    """
+    moves[p][n] is the number of moves for n discs on p pegs,
+    splits[p][n] is how many top discs are parked on a spare peg first.
+    """
+
+    moves: Tuple[Tuple[int, ...], ...]
+    splits: Tuple[Tuple[int, ...], ...]
 
 
 def hanoi(
@@ -39,6 +63,127 @@ def hanoi(
         hanoi(other_peg, to_peg, from_peg, disk - 1)
 
 
+def move_at(k: int, discs: int) -> Move:
+    """
+    The k-th (1 based) move of the optimal solution for discs discs
+    computed from the binary representation of k,
+    without simulating the moves before it.
+    """
+    if not 0 < k < 1 << discs:
+        raise ValueError(f"k must be between 1 and {(1 << discs) - 1}")
+    # the smallest disc (number discs) moves on odd steps, the next one
+    # on steps divisible by 2 but not 4, and so on
+    disc = discs - ((k & -k).bit_length() - 1)
+    from_peg = (k & (k - 1)) % 3
+    to_peg = ((k | (k - 1)) + 1) % 3
+    # the formula moves the tower to peg 1 for even and peg 2 for odd
+    # number of discs, swap TO_PEG and OTHER_PEG for the odd case
+    if discs % 2:
+        from_peg, to_peg = -from_peg % 3, -to_peg % 3
+    return Move(disc, from_peg, to_peg)
+
+
+def hanoi_moves(discs: int) -> Iterator[Move]:
+    """Lazily yields all 2 ** discs - 1 moves of the solution."""
+    for k in range(1, 1 << discs):
+        yield move_at(k, discs)
+
+
+def hanoi_iterative(
+    from_peg: List[int], to_peg: List[int], other_peg: List[int]
+) -> None:
+    """
+    Same as hanoi() without recursion and locks, pegs are plain lists
+    with the top of the peg at the end of the list.
+    """
+    discs = len(from_peg)
+    # same peg numbering as in move_at()
+    if discs % 2:
+        pegs = [from_peg, other_peg, to_peg]
+    else:
+        pegs = [from_peg, to_peg, other_peg]
+    for k in range(1, 1 << discs):
+        pegs[((k | (k - 1)) + 1) % 3].append(pegs[(k & (k - 1)) % 3].pop())
+
+
+@lru_cache(maxsize=None)
+def frame_stewart_table(discs: int, pegs: int) -> SplitTable:
+    """
+    Frame–Stewart split points for up to discs discs and pegs pegs
+    computed bottom up with dynamic programming:
+    moves(n, p) = min(2 * moves(t, p) + moves(n - t, p - 1) for 0 < t < n)
+    """
+    if pegs < 3:
+        raise ValueError("at least 3 pegs are needed")
+    moves: List[Tuple[int, ...]] = [(), (), ()]
+    splits: List[Tuple[int, ...]] = [(), (), ()]
+    # with 3 pegs all discs but the bottom one are parked
+    moves.append(tuple((1 << n) - 1 for n in range(discs + 1)))
+    splits.append(tuple(max(n - 1, 0) for n in range(discs + 1)))
+    for p in range(4, pegs + 1):
+        p_moves, p_splits = [0, 1], [0, 0]
+        for n in range(2, discs + 1):
+            t = min(range(1, n), key=lambda t: 2 * p_moves[t] + moves[p - 1][n - t])
+            p_moves.append(2 * p_moves[t] + moves[p - 1][n - t])
+            p_splits.append(t)
+        moves.append(tuple(p_moves[: discs + 1]))
+        splits.append(tuple(p_splits[: discs + 1]))
+    return SplitTable(tuple(moves), tuple(splits))
+
+
+def frame_stewart_count(discs: int, pegs: int) -> int:
+    return frame_stewart_table(discs, pegs).moves[pegs][discs]
+
+
+def hanoi_multi_peg(discs: int, pegs: int) -> Iterator[Move]:
+    """
+    Lazily yields Frame–Stewart moves of discs discs from FROM_PEG to TO_PEG
+    on pegs pegs. Pending sub-towers are kept on an explicit stack,
+    so memory is bounded by discs * pegs however many moves there are.
+    """
+    splits = frame_stewart_table(discs, pegs).splits
+    # sub-tower of n discs with the widest one numbered widest,
+    # moved from towers[0] to towers[1] using towers[2:] as spares
+    stack: List[Tuple[int, int, Tuple[int, ...]]] = [
+        (discs, 1, (FROM_PEG, TO_PEG) + tuple(range(OTHER_PEG, pegs)))
+    ]
+    while stack:
+        n, widest, towers = stack.pop()
+        if n == 0:
+            continue
+        if n == 1:
+            yield Move(widest, towers[0], towers[1])
+            continue
+        source, target, spare, *others = towers
+        t = splits[len(towers)][n]
+        # pushed in reverse order: park the top t discs on the spare peg,
+        # move the rest without the spare peg, bring the top t back
+        stack.append((t, widest + n - t, (spare, target, source, *others)))
+        stack.append((n - t, widest, (source, target, *others)))
+        stack.append((t, widest + n - t, (source, spare, target, *others)))
+
+
+def _run_hanoi(discs: int) -> None:
+    tower_a: LifoQueue = LifoQueue(discs)
+    for i in range(1, discs + 1):
+        tower_a.put(i)
+    hanoi(tower_a, LifoQueue(discs), LifoQueue(discs), discs)
+
+
+def _run_hanoi_iterative(discs: int) -> None:
+    hanoi_iterative(list(range(1, discs + 1)), [], [])
+
+
+def benchmark(min_discs: int = 20, max_discs: int = 30) -> None:
+    for f in [_run_hanoi, _run_hanoi_iterative]:
+        for discs in range(min_discs, max_discs + 1):
+            t = timeit.timeit(lambda: f(discs), number=1)
+            print(f"{f.__name__[5:]}({discs} discs) took: {t:.6f}")
+            if TIME_LIMIT < t:
+                print(f"{f.__name__[5:]}: slower than {TIME_LIMIT}s, stopping")
+                break
+
+
 class Test(unittest.TestCase):
     def test(self):
         # source
@@ -66,6 +211,73 @@ class Test(unittest.TestCase):
         self.assertTrue(tower_c.full())
         self.assertListEqual(tower_c.queue, list(range(1, NUMBER_OF_DISCS + 1)))
 
+    def test_iterative(self):
+        tower_a = list(range(1, NUMBER_OF_DISCS + 1))
+        tower_b: List[int] = []
+        tower_c: List[int] = []
+
+        hanoi_iterative(tower_a, tower_c, tower_b)
+
+        self.assertListEqual(tower_a, [])
+        self.assertListEqual(tower_b, [])
+        self.assertListEqual(tower_c, list(range(1, NUMBER_OF_DISCS + 1)))
+
+    def test_moves_same_as_recursive(self):
+        for discs in range(1, 9):
+            expected: List[Move] = []
+
+            def record(from_peg: int, to_peg: int, other_peg: int, disc: int):
+                if disc == 0:
+                    return
+                record(from_peg, other_peg, to_peg, disc - 1)
+                expected.append(Move(discs - disc + 1, from_peg, to_peg))
+                record(other_peg, to_peg, from_peg, disc - 1)
+
+            record(FROM_PEG, TO_PEG, OTHER_PEG, discs)
+            with self.subTest(discs=discs):
+                self.assertListEqual(list(hanoi_moves(discs)), expected)
+
+    def test_move_at(self):
+        discs = 64
+        self.assertEqual(move_at(1, discs), Move(64, FROM_PEG, OTHER_PEG))
+        self.assertEqual(move_at(1 << 63, discs), Move(1, FROM_PEG, TO_PEG))
+        self.assertEqual(move_at((1 << 64) - 1, discs), Move(64, OTHER_PEG, TO_PEG))
+        with self.assertRaises(ValueError):
+            move_at(1 << 64, discs)
+
+    def test_frame_stewart_count(self):
+        # OEIS A007664
+        expected = [0, 1, 3, 5, 9, 13, 17, 25, 33, 41, 49, 65, 81, 97, 113, 129]
+        self.assertListEqual(
+            [frame_stewart_count(n, 4) for n in range(16)], expected
+        )
+        self.assertEqual(frame_stewart_count(64, 4), 18_433)
+        self.assertEqual(frame_stewart_count(10, 3), 1023)
+
+    def test_multi_peg(self):
+        for pegs in range(3, 7):
+            for discs in range(0, 12):
+                towers: List[List[int]] = [[] for _ in range(pegs)]
+                towers[FROM_PEG] = list(range(1, discs + 1))
+                count = 0
+                for move in hanoi_multi_peg(discs, pegs):
+                    disc = towers[move.from_peg].pop()
+                    self.assertEqual(disc, move.disc)
+                    # a wider disc has a smaller number
+                    if towers[move.to_peg]:
+                        self.assertLess(towers[move.to_peg][-1], disc)
+                    towers[move.to_peg].append(disc)
+                    count += 1
+                with self.subTest(pegs=pegs, discs=discs):
+                    self.assertListEqual(towers[TO_PEG], list(range(1, discs + 1)))
+                    self.assertEqual(count, frame_stewart_count(discs, pegs))
+
+    def test_multi_peg_64_discs(self):
+        moves = hanoi_multi_peg(64, 6)
+        self.assertEqual(next(moves), Move(64, FROM_PEG, OTHER_PEG))
+        self.assertEqual(sum(1 for _ in moves) + 1, frame_stewart_count(64, 6))
+
 
 if __name__ == "__main__":
+    benchmark()
     unittest.main()
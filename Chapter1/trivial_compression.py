@@ -1,50 +1,236 @@
+import io
+import mmap
+import os
+import tempfile
+import timeit
 import unittest
 from sys import getsizeof
 from random import choices
-from typing import Dict, List
+from typing import BinaryIO, Iterator, List, Union
 
 
-CompressMapper = Dict[str, int]
-DecompressMapper = Dict[int, str]
-
 NUCLEOTIDES = "ACGT"
+BASES_PER_BYTE = 4
+INVALID = 0xFF
+# packed file layout: MAGIC, number of bases as 8 byte big endian, packed bases
+MAGIC = b"CGENE001"
+HEADER_SIZE = len(MAGIC) + 8
+# bases read from FASTA or unpacked from a packed file at once
+CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def _compress_table(shift: int) -> bytes:
+    """Maps nucleotide ASCII code to its 2 bit code shifted left by shift."""
+    table = bytearray([INVALID]) * 256
+    for i, nucleotide in enumerate(NUCLEOTIDES):
+        table[ord(nucleotide)] = table[ord(nucleotide.lower())] = i << shift
+    return bytes(table)
+
+
+def _decompress_table(shift: int) -> bytes:
+    """Maps packed byte to the nucleotide stored at bit position shift."""
+    return bytes(ord(NUCLEOTIDES[byte >> shift & 0b11]) for byte in range(256))
+
+
+# the first nucleotide of every byte is stored in the highest two bits
+SHIFTS = [6, 4, 2, 0]
+COMPRESS_TABLES = [_compress_table(shift) for shift in SHIFTS]
+DECOMPRESS_TABLES = [_decompress_table(shift) for shift in SHIFTS]
+
+
+def pack(raw: bytes) -> bytes:
+    """Packs ASCII nucleotides, padded with 'A' up to a whole number of bytes."""
+    raw += b"A" * (-len(raw) % BASES_PER_BYTE)
+    packed = 0
+    for i, table in enumerate(COMPRESS_TABLES):
+        codes = raw[i::BASES_PER_BYTE].translate(table)
+        if INVALID in codes:
+            raise ValueError(f"Invalid nucleotide in gene, expected {NUCLEOTIDES}")
+        # codes of different positions don't share bits, so OR merges them
+        packed |= int.from_bytes(codes, "big")
+    return packed.to_bytes(len(raw) // BASES_PER_BYTE, "big")
+
+
+def unpack(packed: bytes) -> bytearray:
+    """Unpacks all four ASCII nucleotides of every byte, padding included."""
+    gene = bytearray(len(packed) * BASES_PER_BYTE)
+    for i, table in enumerate(DECOMPRESS_TABLES):
+        gene[i::BASES_PER_BYTE] = packed.translate(table)
+    return gene
 
 
 class CompressedGene:
-    compress_mapping: CompressMapper = {k: i for i, k in enumerate(NUCLEOTIDES)}
-    decompress_mapping: DecompressMapper = {i: k for i, k in enumerate(NUCLEOTIDES)}
+    """
+    Gene packed four nucleotides per byte. Packing and unpacking
+    are done with bytes.translate and extended slices, so both are O(n)
+    without a Python level loop over nucleotides.
+    """
 
     def __init__(self, gene: str) -> None:
-        self.bit_string = self.compress(gene)
+        self.length = len(gene)
+        self.packed = self.compress(gene)
 
-    def compress(self, gene: str) -> int:
-        bit_string: int = 0  # start with sentinel
-        for nucleotide in gene.upper():
-            bit_string <<= 2  # shift left two bits
-            bit_string |= self.compress_mapping[nucleotide]
-        return bit_string
+    def compress(self, gene: str) -> bytes:
+        # padding is ignored on decompress, length keeps the real size
+        return pack(gene.encode("ascii"))
 
     def decompress(self) -> str:
-        gene: List[str] = []
-        for i in range(0, self.bit_string.bit_length(), 2):
-            bits = self.bit_string >> i & 0b11
-            gene.append(self.decompress_mapping[bits])
+        gene = unpack(self.packed)
+        del gene[self.length :]
+        return gene.decode("ascii")
 
-        return "".join(reversed(gene))
+    def save(self, path: str) -> None:
+        """Writes the gene in the packed file format read by PackedGene."""
+        with open(path, "wb") as f:
+            f.write(MAGIC + self.length.to_bytes(8, "big") + self.packed)
+
+    def __len__(self) -> int:
+        return self.length
 
     def __repr__(self) -> str:
         return self.decompress()
 
 
+def _read_fasta_chunks(f: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    """
+    Yields nucleotides of a FASTA file without headers and line breaks,
+    reading fixed size blocks however long the lines are.
+    """
+    comments = (b">", b";")
+    # a header line may continue from one block into the next
+    line_start, in_header = True, False
+    while True:
+        block = f.read(chunk_size)
+        if not block:
+            return
+        chunk = block
+        if in_header or b">" in block or b";" in block:
+            kept = []
+            for i, line in enumerate(block.split(b"\n")):
+                if i or line_start:
+                    in_header = line.startswith(comments)
+                if not in_header:
+                    kept.append(line)
+            chunk = b"".join(kept)
+        line_start = block.endswith(b"\n")
+        yield chunk.translate(None, b" \t\r\n")
+
+
+def compress_fasta(
+    fasta_path: str, packed_path: str, chunk_size: int = CHUNK_SIZE
+) -> int:
+    """
+    Packs all sequences of a FASTA file into one packed gene file,
+    reading and writing chunk by chunk. Returns the number of bases.
+    """
+    length = 0
+    with open(fasta_path, "rb") as fasta, open(packed_path, "wb") as packed:
+        # the length is written once all chunks are read
+        packed.write(MAGIC + bytes(8))
+        rest = b""
+        for chunk in _read_fasta_chunks(fasta, chunk_size):
+            chunk = rest + chunk
+            whole = len(chunk) - len(chunk) % BASES_PER_BYTE
+            packed.write(pack(chunk[:whole]))
+            rest = chunk[whole:]
+            length += whole
+        packed.write(pack(rest))
+        length += len(rest)
+        packed.seek(len(MAGIC))
+        packed.write(length.to_bytes(8, "big"))
+    return length
+
+
+class PackedGene:
+    """
+    Memory mapped packed gene file written by compress_fasta or
+    CompressedGene.save. Slicing, count and iteration only unpack
+    the bytes they need, never the whole gene.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[: len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a packed gene file")
+        self.length = int.from_bytes(self._mmap[len(MAGIC) : HEADER_SIZE], "big")
+
+    def _bases(self, start: int, stop: int) -> bytearray:
+        """Unpacks ASCII nucleotides in [start, stop)"""
+        first = HEADER_SIZE + start // BASES_PER_BYTE
+        last = HEADER_SIZE + -(-stop // BASES_PER_BYTE)
+        offset = start % BASES_PER_BYTE
+        return unpack(self._mmap[first:last])[offset : offset + stop - start]
+
+    def _chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytearray]:
+        for start in range(0, self.length, chunk_size):
+            yield self._bases(start, min(start + chunk_size, self.length))
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: Union[int, slice]) -> str:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            if step != 1:
+                return "".join(self[i] for i in range(start, stop, step))
+            return self._bases(start, max(start, stop)).decode("ascii")
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("gene index out of range")
+        return self._bases(index, index + 1).decode("ascii")
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk in self._chunks():
+            yield from chunk.decode("ascii")
+
+    def count(self, nucleotide: str) -> int:
+        code = ord(nucleotide.upper())
+        return sum(chunk.count(code) for chunk in self._chunks())
+
+    def decompress(self) -> str:
+        return self[:]
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def __enter__(self) -> "PackedGene":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def random_gene(length: int) -> str:
+    # every random byte maps to one of the nucleotides by its lowest two bits
+    table = bytes(ord(NUCLEOTIDES[i & 0b11]) for i in range(256))
+    return os.urandom(length).translate(table).decode("ascii")
+
+
+def benchmark(lengths: List[int]) -> None:
+    for length in lengths:
+        gene = random_gene(length)
+        compressed = CompressedGene(gene)
+        t_compress = timeit.timeit(lambda: CompressedGene(gene), number=1)
+        t_decompress = timeit.timeit(compressed.decompress, number=1)
+        print(
+            f"{length:_} bases: compress took {t_compress:.6f}, "
+            f"decompress took {t_decompress:.6f}, "
+            f"{getsizeof(compressed.packed) / getsizeof(gene):.2f} of the size"
+        )
+
+
 class Tests(unittest.TestCase):
     def test_compress(self):
         original = "".join(choices(NUCLEOTIDES, k=1000))
         compressed = CompressedGene(original)
 
         self.assertEqual(getsizeof(original), 1049)
-        self.assertEqual(getsizeof(compressed.bit_string), 292)
-        compress_ratio = getsizeof(compressed.bit_string) / getsizeof(original)
-        self.assertAlmostEqual(compress_ratio, 0.28, places=2)
+        self.assertEqual(getsizeof(compressed.packed), 283)
+        compress_ratio = getsizeof(compressed.packed) / getsizeof(original)
+        self.assertAlmostEqual(compress_ratio, 0.27, places=2)
 
     def test_equality(self):
         original = "".join(choices(NUCLEOTIDES, k=10))
@@ -52,6 +238,67 @@ class Tests(unittest.TestCase):
 
         self.assertEqual(original, str(compressed))
 
+    def test_leading_a(self):
+        for original in ["", "A", "AAAA", "AAAAAC", "AACGTTA"]:
+            with self.subTest(original=original):
+                compressed = CompressedGene(original)
+                self.assertEqual(str(compressed), original)
+                self.assertEqual(len(compressed), len(original))
+
+    def test_lower_case(self):
+        self.assertEqual(str(CompressedGene("acgtA")), "ACGTA")
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            CompressedGene("ACGTN")
+
+    def test_long(self):
+        original = random_gene(100_003)
+        self.assertEqual(CompressedGene(original).decompress(), original)
+
+    def test_fasta(self):
+        gene = random_gene(10_003)
+        lines = [gene[i : i + 60] for i in range(0, len(gene), 60)]
+        fasta = ">chr1 test\n" + "\n".join(lines[:50]) + "\n>chr2\n"
+        fasta += "\r\n".join(line.lower() for line in lines[50:]) + "\n"
+        with tempfile.TemporaryDirectory() as directory:
+            fasta_path = os.path.join(directory, "gene.fa")
+            packed_path = os.path.join(directory, "gene.cgene")
+            with open(fasta_path, "w") as f:
+                f.write(fasta)
+            # small odd chunks to cross line, header and byte boundaries
+            self.assertEqual(compress_fasta(fasta_path, packed_path, 101), len(gene))
+            with PackedGene(packed_path) as packed:
+                self.assertEqual(len(packed), len(gene))
+                self.assertEqual(packed.decompress(), gene)
+                self.assertEqual(packed[5], gene[5])
+                self.assertEqual(packed[-1], gene[-1])
+                self.assertEqual(packed[3:4_999], gene[3:4_999])
+                self.assertEqual(packed[10:2:-3], gene[10:2:-3])
+                self.assertEqual(packed[7:7], "")
+                self.assertEqual("".join(packed), gene)
+                for nucleotide in NUCLEOTIDES:
+                    self.assertEqual(packed.count(nucleotide), gene.count(nucleotide))
+                with self.assertRaises(IndexError):
+                    packed[len(gene)]
+
+    def test_save(self):
+        gene = "AACGTTGCA"
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "gene.cgene")
+            CompressedGene(gene).save(path)
+            with PackedGene(path) as packed:
+                self.assertEqual(packed.decompress(), gene)
+
+    def test_fasta_unwrapped(self):
+        gene = random_gene(10_003)
+        # one line per sequence and a header longer than a block
+        fasta = f">{'x' * 300}\n{gene[:5_000]}\n;note\n>chr2\n{gene[5_000:]}"
+        chunks = list(_read_fasta_chunks(io.BytesIO(fasta.encode()), 128))
+        self.assertLessEqual(max(len(chunk) for chunk in chunks), 128)
+        self.assertEqual(b"".join(chunks).decode(), gene)
+
 
 if __name__ == "__main__":
+    benchmark([10 ** 6, 10 ** 7, 10 ** 8])
     unittest.main()
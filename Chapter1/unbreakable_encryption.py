@@ -1,7 +1,20 @@
+from itertools import accumulate
+from queue import Empty, Full, Queue
 from secrets import token_bytes
-from typing import Tuple
+from threading import Event, Lock, Thread
+from typing import BinaryIO, Iterable, List, Optional, Tuple
+import atexit
+import io
+import os
+import tempfile
+import timeit
 import unittest
 
+# bytes encrypted at once by the stream functions
+CHUNK_SIZE = 1024 * 1024
+# random bytes fetched by KeyPool at once
+POOL_SIZE = 4 * 1024 * 1024
+
 
 def random_key(length: int) -> int:
     # generate length random bytes
@@ -24,6 +37,214 @@ def decrypt(key: int, encrypted_data: int) -> str:
     return temp.decode()
 
 
+def xor_bytes(data: bytes, key: bytes) -> bytes:
+    """
+    XOR of two byte strings of the same length done as one big int XOR.
+    Unlike decrypt() the result keeps the length of data, leading NUL bytes too.
+    """
+    xored = int.from_bytes(data, "big") ^ int.from_bytes(key, "big")
+    return xored.to_bytes(len(data), "big")
+
+
+def encrypt_stream(
+    source: BinaryIO,
+    encrypted: BinaryIO,
+    key: BinaryIO,
+    chunk_size: int = CHUNK_SIZE,
+) -> int:
+    """
+    Encrypts source into encrypted and writes the one-time pad into key
+    chunk by chunk, so memory use doesn't depend on the size of source.
+    Returns the number of encrypted bytes.
+    """
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    total = 0
+    while True:
+        size = source.readinto(buffer)
+        if not size:
+            return total
+        pad = token_bytes(size)
+        key.write(pad)
+        encrypted.write(xor_bytes(view[:size], pad))
+        total += size
+
+
+def decrypt_stream(
+    key: BinaryIO,
+    encrypted: BinaryIO,
+    decrypted: BinaryIO,
+    chunk_size: int = CHUNK_SIZE,
+) -> int:
+    """Reverse of encrypt_stream, returns the number of decrypted bytes."""
+    data_buffer, key_buffer = bytearray(chunk_size), bytearray(chunk_size)
+    data_view, key_view = memoryview(data_buffer), memoryview(key_buffer)
+    total = 0
+    while True:
+        size = encrypted.readinto(data_buffer)
+        if not size:
+            return total
+        # readinto of a file may return less than asked, read the whole pad
+        key_size = 0
+        while key_size < size:
+            read = key.readinto(key_view[key_size:size])
+            if not read:
+                raise ValueError("Key is shorter than the encrypted data")
+            key_size += read
+        decrypted.write(xor_bytes(data_view[:size], key_view[:size]))
+        total += size
+
+
+def encrypt_file(path: str, encrypted_path: str, key_path: str) -> int:
+    with open(path, "rb") as source, open(encrypted_path, "wb") as encrypted:
+        with open(key_path, "wb") as key:
+            return encrypt_stream(source, encrypted, key)
+
+
+def decrypt_file(key_path: str, encrypted_path: str, decrypted_path: str) -> int:
+    with open(key_path, "rb") as key, open(encrypted_path, "rb") as encrypted:
+        with open(decrypted_path, "wb") as decrypted:
+            return decrypt_stream(key, encrypted, decrypted)
+
+
+class KeyPool:
+    """
+    One-time pad bytes served from a large prefetched random buffer.
+    A background thread prepares the next buffer while the current one
+    is being used, so callers don't pay for a token_bytes call per key.
+    Every byte is handed out only once.
+    """
+
+    def __init__(self, size: int = POOL_SIZE) -> None:
+        self.size = size
+        self._buffer = memoryview(token_bytes(size))
+        self._offset = 0
+        self._lock = Lock()
+        self._ready: Queue = Queue(maxsize=1)
+        self._closed = Event()
+        self._thread = Thread(target=self._refill, daemon=True)
+        self._thread.start()
+
+    def _refill(self) -> None:
+        while not self._closed.is_set():
+            buffer = token_bytes(self.size)
+            while not self._closed.is_set():
+                try:
+                    self._ready.put(buffer, timeout=0.1)
+                    break
+                except Full:
+                    continue
+
+    def take(self, length: int) -> memoryview:
+        """
+        Returns length unused random bytes without copying them.
+        Raises ValueError once the pool is closed.
+        """
+        if self._closed.is_set():
+            raise ValueError("KeyPool is closed")
+        if self.size < length:
+            return memoryview(token_bytes(length))
+        with self._lock:
+            if self.size - self._offset < length:
+                # the rest of the current buffer is dropped, never reused
+                self._buffer = memoryview(self._next_buffer())
+                self._offset = 0
+            start = self._offset
+            self._offset += length
+            return self._buffer[start : self._offset]
+
+    def _next_buffer(self) -> bytes:
+        # the refill thread stops on close, so waiting is bounded
+        while True:
+            try:
+                return self._ready.get(timeout=0.1)
+            except Empty:
+                if self._closed.is_set():
+                    raise ValueError("KeyPool is closed")
+
+    def close(self) -> None:
+        self._closed.set()
+        self._thread.join()
+
+    def __enter__(self) -> "KeyPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+_default_pool: Optional[KeyPool] = None
+
+
+def _get_pool(pool: Optional[KeyPool]) -> KeyPool:
+    global _default_pool
+    if pool is not None:
+        return pool
+    if _default_pool is None:
+        _default_pool = KeyPool()
+        atexit.register(_default_pool.close)
+    return _default_pool
+
+
+def _split(data: bytes, lengths: List[int]) -> List[bytes]:
+    ends = list(accumulate(lengths))
+    return [data[end - length : end] for end, length in zip(ends, lengths)]
+
+
+def encrypt_many(
+    messages: Iterable[str], pool: Optional[KeyPool] = None
+) -> List[Tuple[bytes, bytes]]:
+    """
+    Encrypts all messages with one pad slice and one XOR,
+    returns (key, encrypted) bytes for every message.
+    """
+    encoded = [message.encode() for message in messages]
+    lengths = [len(message) for message in encoded]
+    data = b"".join(encoded)
+    key = _get_pool(pool).take(len(data))
+    return list(zip(_split(bytes(key), lengths), _split(xor_bytes(data, key), lengths)))
+
+
+def decrypt_many(pairs: Iterable[Tuple[bytes, bytes]]) -> List[str]:
+    """Decrypts (key, encrypted) pairs returned by encrypt_many."""
+    pairs = list(pairs)
+    if any(len(key) != len(encrypted) for key, encrypted in pairs):
+        raise ValueError("Every key must have the length of its message")
+    lengths = [len(encrypted) for _, encrypted in pairs]
+    keys = b"".join(key for key, _ in pairs)
+    data = b"".join(encrypted for _, encrypted in pairs)
+    return [message.decode() for message in _split(xor_bytes(data, keys), lengths)]
+
+
+def benchmark_many(count: int = 100_000) -> None:
+    messages = [f"message number {i}" for i in range(count)]
+    t = timeit.timeit(lambda: [encrypt(message) for message in messages], number=1)
+    print(f"encrypt {count:_} messages took: {t:.6f}")
+    with KeyPool() as pool:
+        t = timeit.timeit(lambda: encrypt_many(messages, pool), number=1)
+    print(f"encrypt_many {count:_} messages took: {t:.6f}")
+
+
+def benchmark(size: int = 256 * 1024 * 1024) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path, encrypted_path, key_path, decrypted_path = (
+            os.path.join(directory, name)
+            for name in ["data", "encrypted", "key", "decrypted"]
+        )
+        with open(path, "wb") as f:
+            for _ in range(0, size, CHUNK_SIZE):
+                f.write(os.urandom(CHUNK_SIZE))
+        megabytes = os.path.getsize(path) / 1024 / 1024
+        t = timeit.timeit(
+            lambda: encrypt_file(path, encrypted_path, key_path), number=1
+        )
+        print(f"encrypt_file: {megabytes / t:.1f} MB/s")
+        t = timeit.timeit(
+            lambda: decrypt_file(key_path, encrypted_path, decrypted_path), number=1
+        )
+        print(f"decrypt_file: {megabytes / t:.1f} MB/s")
+
+
 class Tests(unittest.TestCase):
     def test_encryption_decryption(self):
         text = "Some dummy text that will be encrypted"
@@ -32,6 +253,76 @@ class Tests(unittest.TestCase):
 
         self.assertEqual(result, text)
 
+    def test_stream(self):
+        # leading NUL bytes and a size that isn't a multiple of the chunk size
+        data = b"\x00\x00" + os.urandom(10_000)
+        key, encrypted, decrypted = io.BytesIO(), io.BytesIO(), io.BytesIO()
+        self.assertEqual(
+            encrypt_stream(io.BytesIO(data), encrypted, key, chunk_size=999),
+            len(data),
+        )
+        self.assertNotEqual(encrypted.getvalue(), data)
+        self.assertEqual(len(key.getvalue()), len(data))
+        key.seek(0)
+        encrypted.seek(0)
+        self.assertEqual(decrypt_stream(key, encrypted, decrypted, 512), len(data))
+        self.assertEqual(decrypted.getvalue(), data)
+
+    def test_short_key(self):
+        with self.assertRaises(ValueError):
+            decrypt_stream(io.BytesIO(b"12"), io.BytesIO(b"123"), io.BytesIO())
+
+    def test_file(self):
+        data = os.urandom(3 * CHUNK_SIZE + 7)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "data")
+            with open(path, "wb") as f:
+                f.write(data)
+            encrypt_file(path, path + ".encrypted", path + ".key")
+            decrypt_file(path + ".key", path + ".encrypted", path + ".decrypted")
+            with open(path + ".decrypted", "rb") as f:
+                self.assertEqual(f.read(), data)
+
+    def test_many(self):
+        messages = ["", "Some dummy text", "\x00 leading NUL", "ünïcode"]
+        with KeyPool(size=20) as pool:
+            pairs = encrypt_many(messages, pool)
+            self.assertListEqual(decrypt_many(pairs), messages)
+            for (key, encrypted), message in zip(pairs, messages):
+                self.assertIsInstance(key, bytes)
+                self.assertEqual(len(key), len(message.encode()))
+                self.assertEqual(len(encrypted), len(message.encode()))
+
+    def test_key_pool_never_reuses_bytes(self):
+        with KeyPool(size=1000) as pool:
+            keys = [bytes(pool.take(300)) for _ in range(10)]
+            # bigger than the pool
+            keys.append(bytes(pool.take(5000)))
+        self.assertListEqual([len(key) for key in keys], [300] * 10 + [5000])
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_key_pool_closed(self):
+        pool = KeyPool(size=100)
+        pool.take(60)
+        pool.close()
+        with self.assertRaises(ValueError):
+            pool.take(60)
+        # a caller already waiting for the next buffer gives up too
+        while not pool._ready.empty():
+            pool._ready.get()
+        with self.assertRaises(ValueError):
+            pool._next_buffer()
+
+    def test_decrypt_many_wrong_key(self):
+        with self.assertRaises(ValueError):
+            decrypt_many([(b"1", b"12")])
+        (key_a, a), (key_bcd, bcd) = encrypt_many(["a", "bcd"])
+        # the total lengths match, the lengths of the pairs don't
+        with self.assertRaises(ValueError):
+            decrypt_many([(key_bcd, a), (key_a, bcd)])
+
 
 if __name__ == "__main__":
+    benchmark_many()
+    benchmark()
     unittest.main()
@@ -1,5 +1,10 @@
+from array import array
 from enum import IntEnum
-from typing import List
+from random import choices
+import os
+import tempfile
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import timeit
 import unittest
 from collections import namedtuple
 
@@ -10,13 +15,87 @@ Gene = List[Codon]
 
 GENE_STR = "ACGTGGCTCTCTAACGTACGTACGTACGGGGTTTATATATACCCTAGGACTCCCTTT"
 
+# nucleotides read from a file at once
+CHUNK_SIZE = 1024 * 1024
+WHITESPACE = str.maketrans("", "", " \t\r\n")
+
+# every codon fits into 6 bits, two for each nucleotide
+CODONS_COUNT = 4 ** 3
+INVALID = 0xFF
+
+
+def _code_table(shift: int) -> bytes:
+    """
+    bytes.translate table for one nucleotide of a codon: shift 4 places the
+    first nucleotide in bits 4-5 of the codon code, 2 the second in bits 2-3
+    and 0 the third in bits 0-1. Anything but A, C, G and T becomes INVALID.
+    """
+    table = bytearray([INVALID]) * 256
+    for nucleotide in Nucleotide:
+        table[ord(nucleotide.name)] = nucleotide.value - 1 << shift
+    return bytes(table)
+
+
+CODE_TABLES = [_code_table(shift) for shift in (4, 2, 0)]
+
+
+def _positions_typecode(size: int) -> str:
+    """Typecode of position arrays, 4 bytes per position while they fit"""
+    return "I" if size <= 1 << 32 else "Q"
+
 
 def str_to_gene(s: str) -> Gene:
     iters = [iter(s)] * 3
     return [Codon(a, b, c) for a, b, c in zip(*iters)]
 
 
-def linear_contains(gene: Gene, codon: Codon) -> bool:
+def read_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Yields the nucleotides of a sequence file without line breaks."""
+    with open(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk.translate(WHITESPACE).upper()
+
+
+def stream_codons(chunks: Iterable[str], frame: int = 0) -> Iterator[Codon]:
+    """
+    Lazily yields codons of one reading frame, a codon may be split
+    between chunks. Memory use depends on the chunk size only.
+    """
+    skip = frame
+    rest = ""
+    for chunk in chunks:
+        if skip:
+            skipped = chunk[:skip]
+            chunk = chunk[skip:]
+            skip -= len(skipped)
+        data = rest + chunk
+        end = len(data) - len(data) % 3
+        iters = [iter(data[:end])] * 3
+        yield from map(Codon, *iters)
+        rest = data[end:]
+
+
+def stream_frames(chunks: Iterable[str]) -> Iterator[Tuple[int, Codon]]:
+    """
+    Lazily yields (frame, codon) of all three reading frames
+    in the order of the codon positions in the gene.
+    """
+    position = 0
+    rest = ""
+    for chunk in chunks:
+        data = rest + chunk
+        for i, codon in enumerate(map(Codon, data, data[1:], data[2:])):
+            yield (position + i) % 3, codon
+        # the last two nucleotides start codons finished by the next chunk
+        consumed = max(len(data) - 2, 0)
+        position += consumed
+        rest = data[consumed:]
+
+
+def linear_contains(gene: Iterable[Codon], codon: Codon) -> bool:
     return any(g == codon for g in gene)
 
 
@@ -35,6 +114,166 @@ def binary_contains(gene: Gene, codon: Codon) -> bool:
     return False
 
 
+def codon_to_code(codon: Codon) -> int:
+    return sum(Nucleotide[n].value - 1 << shift for n, shift in zip(codon, (4, 2, 0)))
+
+
+def _known_code(codon: Codon) -> Optional[int]:
+    """Code of codon, None if it isn't made of A, C, G and T"""
+    try:
+        return codon_to_code(codon)
+    except KeyError:
+        return None
+
+
+def _motif_codes(motif: Gene) -> Optional[bytes]:
+    codes = [_known_code(codon) for codon in motif]
+    return None if None in codes else bytes(codes)  # type: ignore
+
+
+def code_to_codon(code: int) -> Codon:
+    return Codon(*(Nucleotide((code >> shift & 0b11) + 1).name for shift in (4, 2, 0)))
+
+
+class CompactGene:
+    """
+    Gene stored as one 6 bit codon code per byte. Presence bitmap, counts
+    and positions of every codon are built once, so contains and count
+    are O(1) and positions_of is O(k) for k occurrences. Codons not made
+    of A, C, G and T are never found.
+    """
+
+    def __init__(self, s: str) -> None:
+        raw = s.encode("ascii")
+        size = len(raw) // 3
+        code = 0
+        for i, table in enumerate(CODE_TABLES):
+            part = raw[i : size * 3 : 3].translate(table)
+            if INVALID in part:
+                raise ValueError("Gene may contain only A, C, G and T")
+            # every part fills its own bit pair of each codon code
+            code |= int.from_bytes(part, "big")
+        self.codes = code.to_bytes(size, "big")
+        self.counts = [self.codes.count(code) for code in range(CODONS_COUNT)]
+        self.bitmap = sum(1 << code for code, n in enumerate(self.counts) if n)
+        self.typecode = _positions_typecode(size)
+        self.positions: Dict[int, array] = {
+            code: array(self.typecode) for code, n in enumerate(self.counts) if n
+        }
+        for position, code in enumerate(self.codes):
+            self.positions[code].append(position)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> Codon:
+        return code_to_codon(self.codes[index])
+
+    def contains(self, codon: Codon) -> bool:
+        code = _known_code(codon)
+        return code is not None and bool(self.bitmap >> code & 1)
+
+    def count(self, codon: Codon) -> int:
+        code = _known_code(codon)
+        return 0 if code is None else self.counts[code]
+
+    def positions_of(self, codon: Codon) -> array:
+        """
+        Codon indexes of all occurrences of codon in increasing order,
+        a copy the caller may change without touching the index.
+        """
+        return array(self.typecode, self.positions.get(_known_code(codon), ()))
+
+    def contains_many(self, codons: Iterable[Codon]) -> List[bool]:
+        return [self.contains(codon) for codon in codons]
+
+    def count_many(self, codons: Iterable[Codon]) -> List[int]:
+        return [self.count(codon) for codon in codons]
+
+
+class Occurrence(NamedTuple):
+    frame: int  # reading frame, 0, 1 or 2
+    index: int  # codon index inside of the frame
+
+    @property
+    def position(self) -> int:
+        """Nucleotide position in the gene string"""
+        return self.frame + 3 * self.index
+
+
+class MotifIndex:
+    """
+    Index of every k codons long window in all three reading frames.
+    A motif is looked up by its first k codons, or by its first codon
+    when it's shorter, and only those candidates are verified.
+    """
+
+    def __init__(self, s: str, k: int = 3) -> None:
+        self.k = k
+        self.frames = [CompactGene(s[frame:]) for frame in range(3)]
+        self.windows: List[Dict[bytes, array]] = []
+        for gene in self.frames:
+            codes = gene.codes
+            windows: Dict[bytes, array] = {}
+            for i in range(len(codes) - k + 1):
+                window = codes[i : i + k]
+                if window not in windows:
+                    windows[window] = array(gene.typecode)
+                windows[window].append(i)
+            self.windows.append(windows)
+
+    def _find(self, frame: int, motif: bytes) -> Sequence[int]:
+        gene = self.frames[frame]
+        if self.k <= len(motif):
+            candidates = self.windows[frame].get(motif[: self.k], array(gene.typecode))
+            if len(motif) == self.k:
+                return candidates
+        else:
+            candidates = gene.positions.get(motif[0], array(gene.typecode))
+            if len(motif) == 1:
+                return candidates
+        return [i for i in candidates if gene.codes.startswith(motif, i)]
+
+    def occurrences(self, motif: Gene) -> List[Occurrence]:
+        """All occurrences of motif sorted by frame and codon index."""
+        codes = _motif_codes(motif)
+        if not codes:
+            return []
+        return [
+            Occurrence(frame, index)
+            for frame in range(3)
+            for index in self._find(frame, codes)
+        ]
+
+    def count(self, motif: Gene) -> int:
+        codes = _motif_codes(motif)
+        if not codes:
+            return 0
+        return sum(len(self._find(frame, codes)) for frame in range(3))
+
+    def contains(self, motif: Gene) -> bool:
+        codes = _motif_codes(motif)
+        return bool(codes) and any(self._find(frame, codes) for frame in range(3))
+
+
+def benchmark(length: int = 3_000_000) -> None:
+    gene_str = "".join(choices("ACGT", k=length))
+    gene = str_to_gene(gene_str)
+    t = timeit.timeit(lambda: MotifIndex(gene_str), number=1)
+    print(f"MotifIndex of {length:_} nucleotides took: {t:.6f}")
+    index = MotifIndex(gene_str)
+    # worst case for linear_contains, the codon isn't there
+    missing = Codon("A", "C", "X")
+    motif = gene[length // 6 : length // 6 + 4]
+    for name, stmt in [
+        ("linear_contains", lambda: linear_contains(gene, missing)),
+        ("MotifIndex.contains", lambda: index.contains([gene[-1]])),
+        ("MotifIndex.occurrences 4 codons", lambda: index.occurrences(motif)),
+    ]:
+        t = timeit.timeit(stmt, number=10)
+        print(f"{name} took: {t / 10:.6f}")
+
+
 class Test(unittest.TestCase):
     def test_short_gene(self):
         gene_str = "ACGTG"
@@ -66,6 +305,142 @@ class Test(unittest.TestCase):
         gat: Codon = Codon("G", "A", "T")
         self.assertFalse(binary_contains(gene, gat))
 
+    def test_codon_code(self):
+        codons = [code_to_codon(code) for code in range(CODONS_COUNT)]
+        self.assertEqual(len(set(codons)), CODONS_COUNT)
+        self.assertListEqual(
+            [codon_to_code(codon) for codon in codons], list(range(CODONS_COUNT))
+        )
+        self.assertEqual(codon_to_code(Codon("A", "A", "A")), 0)
+        self.assertEqual(codon_to_code(Codon("T", "T", "T")), 63)
+
+    def test_compact_gene(self):
+        gene = str_to_gene(GENE_STR)
+        compact = CompactGene(GENE_STR)
+        self.assertEqual(len(compact), len(gene))
+        self.assertListEqual([compact[i] for i in range(len(compact))], gene)
+        for code in range(CODONS_COUNT):
+            codon = code_to_codon(code)
+            with self.subTest(codon=codon):
+                self.assertEqual(compact.contains(codon), linear_contains(gene, codon))
+                self.assertEqual(compact.count(codon), gene.count(codon))
+                self.assertListEqual(
+                    list(compact.positions_of(codon)),
+                    [i for i, g in enumerate(gene) if g == codon],
+                )
+
+    def test_compact_gene_many(self):
+        compact = CompactGene(GENE_STR)
+        acg, gat = Codon("A", "C", "G"), Codon("G", "A", "T")
+        self.assertListEqual(compact.contains_many([acg, gat]), [True, False])
+        self.assertListEqual(compact.count_many([acg, gat]), [2, 0])
+
+    def test_positions_typecode(self):
+        self.assertEqual(array(_positions_typecode(1_000)).itemsize, 4)
+        self.assertEqual(_positions_typecode(1 << 32), "I")
+        self.assertEqual(_positions_typecode((1 << 32) + 1), "Q")
+        compact = CompactGene(GENE_STR)
+        self.assertEqual(compact.positions_of(Codon("A", "C", "G")).itemsize, 4)
+
+    def test_compact_gene_unknown_codons(self):
+        compact = CompactGene(GENE_STR)
+        for codon in [Codon("A", "C", "X"), Codon("a", "c", "g")]:
+            with self.subTest(codon=codon):
+                self.assertFalse(compact.contains(codon))
+                self.assertEqual(compact.count(codon), 0)
+                self.assertEqual(len(compact.positions_of(codon)), 0)
+                self.assertListEqual(compact.contains_many([codon]), [False])
+                self.assertListEqual(compact.count_many([codon]), [0])
+        index = MotifIndex(GENE_STR)
+        self.assertFalse(index.contains([Codon("A", "C", "X")]))
+        self.assertEqual(index.count([Codon("A", "C", "G"), Codon("X", "X", "X")]), 0)
+
+    def test_positions_of_copy(self):
+        compact = CompactGene(GENE_STR)
+        acg = Codon("A", "C", "G")
+        compact.positions_of(acg).append(1)
+        self.assertEqual(compact.count(acg), len(compact.positions_of(acg)))
+
+    def test_compact_gene_invalid(self):
+        with self.assertRaises(ValueError):
+            CompactGene("ACN")
+
+    def test_motif_index(self):
+        gene_str = "".join(choices("ACGT", k=3_000))
+        index = MotifIndex(gene_str)
+        for length in [1, 2, 3, 5]:
+            for position in [0, 1, 2, 100, 1_000, 2_985]:
+                motif = str_to_gene(gene_str[position : position + 3 * length])
+                motif_str = gene_str[position : position + 3 * length]
+                expected = [
+                    i
+                    for i in range(len(gene_str) - 3 * length + 1)
+                    if gene_str.startswith(motif_str, i)
+                ]
+                with self.subTest(length=length, position=position):
+                    occurrences = index.occurrences(motif)
+                    self.assertListEqual(
+                        sorted(o.position for o in occurrences), expected
+                    )
+                    self.assertEqual(index.count(motif), len(expected))
+                    self.assertTrue(index.contains(motif))
+
+    def test_motif_index_frames(self):
+        index = MotifIndex("AACGTTACG", k=2)
+        self.assertListEqual(
+            index.occurrences(str_to_gene("ACG")),
+            [Occurrence(0, 2), Occurrence(1, 0)],
+        )
+        self.assertListEqual(
+            index.occurrences(str_to_gene("ACGTTA")), [Occurrence(1, 0)]
+        )
+        self.assertListEqual(index.occurrences(str_to_gene("TTAACG")), [])
+        self.assertListEqual(
+            index.occurrences(str_to_gene("CGTTAC")), [Occurrence(2, 0)]
+        )
+        self.assertFalse(index.contains(str_to_gene("GAT")))
+        self.assertEqual(index.count([]), 0)
+
+    def test_stream_codons(self):
+        chunks = [GENE_STR[i : i + 7] for i in range(0, len(GENE_STR), 7)]
+        for frame in range(3):
+            with self.subTest(frame=frame):
+                self.assertListEqual(
+                    list(stream_codons(chunks, frame)), str_to_gene(GENE_STR[frame:])
+                )
+        acg, gtg = Codon(*"ACG"), Codon(*"GTG")
+        self.assertListEqual(list(stream_codons(["A", "C", "GT", "G"])), [acg])
+        self.assertListEqual(list(stream_codons(["A", "C", "GTGA"], 2)), [gtg])
+
+    def test_stream_frames(self):
+        chunks = [GENE_STR[i : i + 5] for i in range(0, len(GENE_STR), 5)]
+        expected = [
+            (i % 3, Codon(*GENE_STR[i : i + 3])) for i in range(len(GENE_STR) - 2)
+        ]
+        self.assertListEqual(list(stream_frames(chunks)), expected)
+        self.assertListEqual(
+            list(stream_frames(["A", "C", "", "G"])), [(0, Codon(*"ACG"))]
+        )
+
+    def test_stream_linear_contains(self):
+        def chunks():
+            yield "ACGTTT"
+            raise AssertionError("linear_contains should stop at the first match")
+
+        self.assertTrue(linear_contains(stream_codons(chunks()), Codon(*"ACG")))
+
+    def test_read_chunks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "gene.txt")
+            with open(path, "w") as f:
+                f.write("acgt\nACGT\r\nAC\n")
+            chunks = list(read_chunks(path, chunk_size=3))
+            self.assertEqual("".join(chunks), "ACGTACGTAC")
+            self.assertListEqual(
+                list(stream_codons(chunks)), str_to_gene("ACGTACGTAC")
+            )
+
 
 if __name__ == "__main__":
+    benchmark()
     unittest.main()
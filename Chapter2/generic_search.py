@@ -1,14 +1,75 @@
+import os
+import timeit
 import unittest
-from typing import TypeVar, Iterable, Sequence
+from array import array
+from bisect import bisect_left
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from random import randrange, sample
+from typing import Generic, TypeVar, Iterable, List, Optional, Sequence
 
 
 T = TypeVar("T")
 
 
 def linear_contains(iterable: Iterable[T], key: T) -> bool:
+    # only bytes, bytearray and array are scanned in C, memoryviews and
+    # other buffers take the generic scan
+    if isinstance(iterable, array) or (
+        isinstance(iterable, (bytes, bytearray))
+        and isinstance(key, int)
+        and 0 <= key < 256
+    ):
+        return key in iterable  # type: ignore
+    # not 'in' for lists, it checks identity before equality
     return any(item == key for item in iterable)
 
 
+# sequence scanned by parallel_contains workers, set once per worker process
+_shared: Sequence = ()
+
+
+def _share(sequence: Sequence[T]) -> None:
+    global _shared
+    _shared = sequence
+
+
+def _chunk_contains(start: int, stop: int, key: T) -> bool:
+    # index scans the bounds in place, without copying the chunk
+    try:
+        _shared.index(key, start, stop)
+    except ValueError:
+        return False
+    return True
+
+
+def parallel_contains(
+    sequence: Sequence[T], key: T, workers: Optional[int] = None
+) -> bool:
+    """
+    Scans chunks of sequence in a process pool, chunks that haven't
+    started yet are cancelled as soon as one worker finds key.
+    The sequence is handed to every worker once, when the worker starts
+    (without copying on platforms that fork), and only chunk bounds are sent
+    with the tasks. Starting the pool costs more than 'key in list' scanning
+    millions of items, so linear_contains never calls it, see benchmark_linear.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunk_size = -(-len(sequence) // (workers * 4)) or 1
+    executor = ProcessPoolExecutor(workers, initializer=_share, initargs=(sequence,))
+    with executor:
+        pending = {
+            executor.submit(_chunk_contains, i, i + chunk_size, key)
+            for i in range(0, len(sequence), chunk_size)
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            if any(future.result() for future in done):
+                for future in pending:
+                    future.cancel()
+                return True
+    return False
+
+
 def binary_contains(sequence: Sequence[T], key: T) -> bool:
     low = 0
     high = len(sequence) - 1
@@ -24,6 +85,117 @@ def binary_contains(sequence: Sequence[T], key: T) -> bool:
     return False
 
 
+def _gallop(sequence: Sequence[T], key: T, low: int, step: int) -> int:
+    """
+    Leftmost position of key in sequence[low:]. The window after low grows
+    by doubling from step until it holds key, then bisect searches it,
+    so a key d items after low is found in O(log d).
+    """
+    size = len(sequence)
+    high = low + step
+    while high < size and sequence[high] < key:
+        low = high + 1
+        step *= 2
+        high = low + step
+    return bisect_left(sequence, key, low, min(high + 1, size))
+
+
+def _eytzinger(sorted_data: Sequence[T]) -> List[T]:
+    """
+    Sorted data in Eytzinger (BFS) order, children of node i are at
+    2i and 2i + 1, so the first levels of the search share cache lines.
+    Index 0 is unused.
+    """
+    layout: List[T] = [sorted_data[0]] * (len(sorted_data) + 1) if sorted_data else []
+    values = iter(sorted_data)
+    # in-order walk over the implicit tree, done without recursion
+    stack: List[int] = []
+    node = 1
+    while stack or node <= len(sorted_data):
+        if node <= len(sorted_data):
+            stack.append(node)
+            node *= 2
+        else:
+            node = stack.pop()
+            layout[node] = next(values)
+            node = node * 2 + 1
+    return layout
+
+
+class SortedIndex(Generic[T]):
+    """
+    Sorted sequence answering many membership queries against it.
+    contains_many sorts the queries and merges them with the data
+    using galloping search, eytzinger=True stores numeric data
+    in the cache-friendly Eytzinger layout for single lookups.
+    """
+
+    def __init__(self, sequence: Sequence[T], eytzinger: bool = False) -> None:
+        self.sequence = sequence
+        self.layout = _eytzinger(sequence) if eytzinger else None
+
+    def contains(self, key: T) -> bool:
+        if self.layout is None:
+            i = bisect_left(self.sequence, key)
+            return i < len(self.sequence) and self.sequence[i] == key
+        layout = self.layout
+        size = len(layout) - 1
+        node = 1
+        while node <= size:
+            value = layout[node]
+            if value == key:
+                return True
+            node = 2 * node + (value < key)
+        return False
+
+    def contains_many(self, keys: Iterable[T]) -> List[bool]:
+        """Answers in the order of keys."""
+        keys = list(keys)
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        result = [False] * len(keys)
+        sequence = self.sequence
+        # expected distance between neighbouring sorted keys
+        step = max(1, len(sequence) // max(len(keys), 1))
+        low = 0
+        for i in order:
+            low = _gallop(sequence, keys[i], low, step)
+            result[i] = low < len(sequence) and sequence[low] == keys[i]
+        return result
+
+
+def benchmark_linear(size: int = 20_000_000) -> None:
+    data = list(range(size))
+    numbers = array("q", data)
+    # a key found first, in the middle and never
+    for key in [0, size // 2, -1]:
+        for name, stmt in [
+            ("'in' over list", lambda: key in data),
+            ("parallel_contains list", lambda: parallel_contains(data, key)),
+            ("linear_contains list", lambda: linear_contains(data, key)),
+            ("linear_contains array", lambda: linear_contains(numbers, key)),
+        ]:
+            t = timeit.timeit(stmt, number=1)
+            print(f"{name} of {size:_} for {key} took: {t:.6f}")
+
+
+def benchmark(size: int = 1_000_000, queries: int = 200_000) -> None:
+    data = sorted(sample(range(size * 4), size))
+    keys = [randrange(size * 4) for _ in range(queries)]
+    index = SortedIndex(data)
+    eytzinger_index = SortedIndex(data, eytzinger=True)
+    for name, stmt in [
+        ("binary_contains loop", lambda: [binary_contains(data, k) for k in keys]),
+        ("SortedIndex.contains loop", lambda: [index.contains(k) for k in keys]),
+        (
+            "Eytzinger SortedIndex.contains loop",
+            lambda: [eytzinger_index.contains(k) for k in keys],
+        ),
+        ("SortedIndex.contains_many", lambda: index.contains_many(keys)),
+    ]:
+        t = timeit.timeit(stmt, number=1)
+        print(f"{name} took: {t:.6f}")
+
+
 class Test(unittest.TestCase):
     def test_linear_contains_exist(self):
         data = [1, 5, 15, 15, 15, 15, 20]
@@ -37,6 +209,55 @@ class Test(unittest.TestCase):
         data = ["john", "mark", "ronald", "sarah"]
         self.assertFalse(binary_contains(data, "sheila"))
 
+    def test_linear_contains_equality_only(self):
+        nan = float("nan")
+        self.assertFalse(linear_contains([nan], nan))
+        self.assertFalse(linear_contains(iter([nan]), nan))
+        self.assertTrue(linear_contains(memoryview(b"abc"), ord("c")))
+
+    def test_linear_contains_bytes_and_arrays(self):
+        self.assertTrue(linear_contains(b"abc", ord("b")))
+        self.assertFalse(linear_contains(bytearray(b"abc"), 0))
+        self.assertFalse(linear_contains(b"abc", "b"))
+        self.assertFalse(linear_contains(b"abc", 300))
+        self.assertFalse(linear_contains(bytearray(b"abc"), -1))
+        self.assertTrue(linear_contains(array("d", [1.5, 2.5]), 2.5))
+        self.assertFalse(linear_contains(array("q", range(100)), 100))
+
+    def test_parallel_contains(self):
+        data = list(range(10_000))
+        self.assertTrue(parallel_contains(data, 9_999, workers=2))
+        self.assertTrue(parallel_contains(data, 0, workers=2))
+        self.assertFalse(parallel_contains(data, -1, workers=2))
+        self.assertFalse(parallel_contains([], 1, workers=2))
+
+    def test_sorted_index(self):
+        data = [1, 5, 15, 15, 15, 15, 20]
+        keys = [20, 0, 15, 16, 1, 21, 5, 5]
+        expected = [k in data for k in keys]
+        for eytzinger in [False, True]:
+            index = SortedIndex(data, eytzinger)
+            with self.subTest(eytzinger=eytzinger):
+                self.assertListEqual([index.contains(k) for k in keys], expected)
+                self.assertListEqual(index.contains_many(keys), expected)
+
+    def test_sorted_index_random(self):
+        data = sorted(sample(range(10_000), 1_000))
+        keys = [randrange(10_000) for _ in range(1_000)]
+        expected = [binary_contains(data, k) for k in keys]
+        self.assertListEqual(SortedIndex(data).contains_many(keys), expected)
+        index = SortedIndex(data, eytzinger=True)
+        self.assertListEqual([index.contains(k) for k in keys], expected)
+
+    def test_sorted_index_empty(self):
+        self.assertListEqual(SortedIndex([]).contains_many(["a"]), [False])
+        self.assertFalse(SortedIndex([], eytzinger=True).contains("a"))
+
+    def test_eytzinger(self):
+        self.assertListEqual(_eytzinger(list(range(1, 8)))[1:], [4, 2, 6, 1, 3, 5, 7])
+
 
 if __name__ == "__main__":
+    benchmark_linear()
+    benchmark()
     unittest.main()
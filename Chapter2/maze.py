@@ -1,9 +1,16 @@
 from __future__ import annotations
 from enum import Enum
-from typing import NamedTuple, List, Tuple, Optional, Union, Callable
-from random import uniform
+from typing import Dict, Set, NamedTuple, List, Tuple, Optional, Union, Callable
+from random import Random, randbytes, randrange, seed
 from queue import LifoQueue, Queue, PriorityQueue
 from math import sqrt
+from heapq import heappop, heappush
+from array import array
+from collections import deque
+import os
+import tempfile
+import timeit
+import unittest
 
 
 class Cell(str, Enum):
@@ -14,7 +21,14 @@ class Cell(str, Enum):
     PATH = "."
 
 
-Grid = List[List[Cell]]
+CostFunction = Callable[["MazeLocation", "MazeLocation"], float]
+
+# cell codes stored in the flat grid
+EMPTY, BLOCKED = ord(Cell.EMPTY.value), ord(Cell.BLOCKED.value)
+
+# MovingAI .map terrain: '.', 'G' and 'S' are passable, the rest is not
+MAP_TO_GRID = bytes(EMPTY if chr(c) in ".GS" else BLOCKED for c in range(256))
+GRID_TO_MAP = bytes(ord("@") if c == BLOCKED else ord(".") for c in range(256))
 
 
 class MazeLocation(NamedTuple):
@@ -33,7 +47,19 @@ class MazeLocation(NamedTuple):
         return distance
 
 
+class FieldCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
 class Node:
+    __slots__ = ("state", "parent", "cost", "heuristic")
+
     def __init__(
         self,
         state: MazeLocation,
@@ -50,6 +76,36 @@ class Node:
         return (self.cost + self.heuristic) < (other.cost + other.heuristic)
 
 
+INFINITY = float("inf")
+NO_PARENT = -1
+
+
+class NodeStore:
+    """
+    Parents and costs of search nodes kept in two parallel arrays indexed
+    by integer state id, instead of one Node object per expanded state.
+    Node objects are only built for the path that is returned.
+    """
+
+    __slots__ = ("parents", "costs")
+
+    def __init__(self, size: int) -> None:
+        self.parents = array("l", [NO_PARENT]) * size
+        self.costs = array("d", [INFINITY]) * size
+
+    def add(self, state_id: int, parent_id: int, cost: float = 0.0) -> None:
+        self.parents[state_id] = parent_id
+        self.costs[state_id] = cost
+
+    def path_ids(self, end: int) -> List[int]:
+        """State ids from the root to end"""
+        ids = [end]
+        while self.parents[ids[-1]] != NO_PARENT:
+            ids.append(self.parents[ids[-1]])
+        ids.reverse()
+        return ids
+
+
 class Maze:
     moves = [(0, 1), (1, 0), (0, -1), (-1, 0)]
 
@@ -60,30 +116,130 @@ class Maze:
         sparseness: float = 0.2,
         start: MazeLocation = MazeLocation(0, 0),
         goal: MazeLocation = MazeLocation(9, 9),
+        random_seed: Optional[int] = None,
     ) -> None:
         # initialize basic instance variables
         self._rows = rows
         self._columns = columns
         self.start = start
         self.goal = goal
-        # fill the grid with empty cells
-        self._grid: Grid = [[Cell.EMPTY for c in range(columns)] for r in range(rows)]
+        self._check_inside(start, "start")
+        self._check_inside(goal, "goal")
+        # number of nodes expanded by the last search and the largest
+        # number of nodes its frontier held at once
+        self.nodes_expanded = 0
+        self.peak_frontier = 0
+        # next step towards the goal for every cell, see goal_field()
+        self._field: Optional[array] = None
+        self._field_goal = -1
+        self._field_hits = 0
+        self._field_misses = 0
+        # incremental planner used by replan()
+        self._planner: Optional[LpaStar] = None
+        # the grid is one flat bytearray of cell codes surrounded by
+        # a border of blocked cells, so neighbours never need bounds checks
+        self._width = columns + 2
+        self._grid = bytearray(self._width * (rows + 2))
+        # cell id offsets of the moves
+        self._offsets = [r * self._width + c for r, c in self.moves]
         # populate the grid with blocked cells
-        self._randomly_fill(sparseness)
-        # fill the start and goal locations in
-        self._grid[start.row][start.column] = Cell.START
-        self._grid[goal.row][goal.column] = Cell.GOAL
+        self._randomly_fill(sparseness, random_seed)
+        self._mark_ends()
 
-    def _randomly_fill(self, sparseness: float) -> None:
-        for row in range(self._rows):
-            for column in range(self._columns):
-                if uniform(0, 1.0) < sparseness:
-                    self._grid[row][column] = Cell.BLOCKED
+    def _mark_ends(self) -> None:
+        """fill the start and goal locations in"""
+        self._grid[self.location_id(self.start)] = ord(Cell.START.value)
+        self._grid[self.location_id(self.goal)] = ord(Cell.GOAL.value)
+
+    def _randomly_fill(self, sparseness: float, random_seed: Optional[int]) -> None:
+        """
+        Turns one random byte per cell into a cell code with bytes.translate,
+        so sparseness has a resolution of 1/256. The same random_seed
+        gives the same maze, without it the global random state is used.
+        """
+        size = len(self._grid)
+        if random_seed is None:
+            noise = randbytes(size)
+        else:
+            noise = Random(random_seed).randbytes(size)
+        threshold = round(sparseness * 256)
+        self._grid[:] = noise.translate(
+            bytes([BLOCKED] * threshold + [EMPTY] * (256 - threshold))
+        )
+        self._block_border()
+
+    def _block_border(self) -> None:
+        grid, width = self._grid, self._width
+        height = self._rows + 2
+        grid[:width] = grid[-width:] = bytes([BLOCKED]) * width
+        grid[::width] = grid[width - 1 :: width] = bytes([BLOCKED]) * height
+
+    @classmethod
+    def load_map(
+        cls,
+        path: str,
+        start: Optional[MazeLocation] = None,
+        goal: Optional[MazeLocation] = None,
+    ) -> Maze:
+        """
+        Reads a MovingAI .map file with one bulk read, start and goal
+        default to the top left and bottom right corners.
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        header, found, body = data.partition(b"\nmap")
+        if not found:
+            raise ValueError(f"{path} is not a MovingAI map, no map line")
+        lines = [line.split(None, 1) for line in header.split(b"\n") if line.strip()]
+        fields = dict(lines)
+        rows, columns = int(fields[b"height"]), int(fields[b"width"])
+        cells = body.partition(b"\n")[2].translate(None, b"\r\n")
+        if len(cells) != rows * columns:
+            raise ValueError(f"{path} should have {rows * columns} cells")
+        maze = cls(
+            rows,
+            columns,
+            0.0,
+            start or MazeLocation(0, 0),
+            goal or MazeLocation(rows - 1, columns - 1),
+        )
+        cells = cells.translate(MAP_TO_GRID)
+        for row in range(rows):
+            first = maze.location_id(MazeLocation(row, 0))
+            row_cells = cells[row * columns : (row + 1) * columns]
+            maze._grid[first : first + columns] = row_cells
+        maze._mark_ends()
+        return maze
+
+    def write_map(self, path: str) -> None:
+        """Writes the maze as a MovingAI .map file, blocked cells as '@'."""
+        header = f"type octile\nheight {self._rows}\nwidth {self._columns}\nmap\n"
+        with open(path, "wb") as f:
+            f.write(header.encode())
+            for row in range(self._rows):
+                first = self.location_id(MazeLocation(row, 0))
+                cells = self._grid[first : first + self._columns]
+                f.write(cells.translate(GRID_TO_MAP) + b"\n")
+
+    def location_id(self, ml: MazeLocation) -> int:
+        """Integer id of the cell in the flat grid"""
+        return (ml.row + 1) * self._width + ml.column + 1
+
+    def location(self, cell_id: int) -> MazeLocation:
+        row, column = divmod(cell_id, self._width)
+        return MazeLocation(row - 1, column - 1)
 
     def goal_test(self, ml: MazeLocation) -> bool:
         """Checks if goals is reached"""
         return ml == self.goal
 
+    def _check_inside(self, ml: MazeLocation, name: str) -> None:
+        # the flat grid has no bounds, an outside location maps to another cell
+        if not (0 <= ml.row < self._rows and 0 <= ml.column < self._columns):
+            raise ValueError(
+                f"{name} {ml} is outside of the {self._rows}x{self._columns} maze"
+            )
+
     def _is_valid_point(self, ml: MazeLocation) -> bool:
         """Checks if point inside of the maze"""
         return (
@@ -91,66 +247,379 @@ class Maze:
             and ml.row < self._rows
             and ml.column < self._columns
             and 0 <= ml.column
-            and self._grid[ml.row][ml.column] != Cell.BLOCKED
+            and self._grid[self.location_id(ml)] != BLOCKED
         )
 
+    def successor_ids(self, cell_id: int) -> List[int]:
+        """Ids of the open neighbours of a cell, the border is always blocked."""
+        grid = self._grid
+        neighbours = [cell_id + offset for offset in self._offsets]
+        return [n for n in neighbours if grid[n] != BLOCKED]
+
     def successors(self, ml: MazeLocation) -> List[MazeLocation]:
         """Finds the possible next locations from a given point."""
-        return [ml.add(l) for l in self.moves if self._is_valid_point(ml.add(l))]
+        return [self.location(n) for n in self.successor_ids(self.location_id(ml))]
 
     def mark(self, path: List[MazeLocation], marker: Cell) -> None:
         for ml in path:
             if ml != self.start and ml != self.goal:
-                self._grid[ml.row][ml.column] = marker
+                self.set_cell(ml, marker)
+
+    def set_cell(self, ml: MazeLocation, cell: Cell) -> None:
+        """Changes a cell, cached goal field is dropped if passability changed."""
+        cell_id = self.location_id(ml)
+        code = ord(cell.value)
+        if (self._grid[cell_id] == BLOCKED) != (code == BLOCKED):
+            self._field = None
+            if self._planner is not None:
+                self._planner.changed.add(cell_id)
+        self._grid[cell_id] = code
+
+    def replan(self) -> Optional[Node]:
+        """
+        Shortest path from start to goal found by LPA*. The search state is
+        kept between calls, so after cell edits only the affected part
+        of the search is repaired instead of searching from scratch.
+        """
+        start, goal = self.location_id(self.start), self.location_id(self.goal)
+        planner = self._planner
+        if planner is None or planner.start != start or planner.goal != goal:
+            self._planner = LpaStar(self, start, goal)
+        return self._planner.plan()
+
+    def goal_field(self) -> array:
+        """
+        Next cell id on a shortest path to the goal for every cell,
+        -1 for the goal and unreachable cells. Computed once by a BFS
+        from the goal and cached until a cell is blocked or freed.
+        """
+        goal = self.location_id(self.goal)
+        if self._field is not None and self._field_goal == goal:
+            self._field_hits += 1
+            return self._field
+        self._field_misses += 1
+        field = array("l", [-1]) * len(self._grid)
+        # the grid is 4-connected and undirected, BFS from the goal
+        # gives shortest paths to it
+        visited = bytearray(len(self._grid))
+        visited[goal] = 1
+        frontier = deque([goal])
+        self.nodes_expanded = 0
+        while frontier:
+            current = frontier.popleft()
+            self.nodes_expanded += 1
+            for child in self.successor_ids(current):
+                if not visited[child]:
+                    visited[child] = 1
+                    field[child] = current
+                    frontier.append(child)
+        self._field, self._field_goal = field, goal
+        return field
+
+    def field_cache_info(self) -> FieldCacheInfo:
+        return FieldCacheInfo(self._field_hits, self._field_misses)
+
+    def path_from(self, start: MazeLocation) -> Optional[Node]:
+        """
+        Shortest path from any start to the goal, walking down the cached
+        goal field in O(path length).
+        """
+        self._check_inside(start, "start")
+        field = self.goal_field()
+        current, goal = self.location_id(start), self.location_id(self.goal)
+        if self._grid[current] == BLOCKED:
+            return None
+        ids = [current]
+        while current != goal:
+            current = field[current]
+            if current == -1:
+                return None
+            ids.append(current)
+        return self._path_node(ids)
 
     def __repr__(self) -> str:
         output = []
-        for row in self._grid:
-            output.append("".join([c.value for c in row]))
+        for row in range(self._rows):
+            first = self.location_id(MazeLocation(row, 0))
+            output.append(self._grid[first : first + self._columns].decode())
         return "\n".join(output)
 
     def calculate(self, frontier: Union[LifoQueue, Queue]) -> Optional[Node]:
         """Uses BFS or DFS based on the storage type."""
-        # frontier is where we've yet to go
-        frontier.put(Node(self.start, None))
+        goal = self.location_id(self.goal)
+        start = self.location_id(self.start)
+        store = NodeStore(len(self._grid))
+        # frontier is where we've yet to go, it holds cell ids only
+        frontier.put(start)
         # explored is where we've been
-        explored = {self.start}
+        explored = bytearray(len(self._grid))
+        explored[start] = 1
+        store.add(start, NO_PARENT)
+        self.nodes_expanded = 0
+        # qsize() takes a lock, the frontier size is counted instead
+        size = self.peak_frontier = 1
 
         while not frontier.empty():
-            current_node = frontier.get()
-            current_state = current_node.state
-            if self.goal_test(current_state):
-                return current_node
-            for child in self.successors(current_state):
+            current = frontier.get()
+            size -= 1
+            if current == goal:
+                return self._node_chain(store, goal)
+            self.nodes_expanded += 1
+            for child in self.successor_ids(current):
                 # skip children we already explored
-                if child in explored:
+                if explored[child]:
                     continue
-                explored.add(child)
-                frontier.put(Node(child, current_node))
+                explored[child] = 1
+                store.add(child, current)
+                frontier.put(child)
+                size += 1
+            self.peak_frontier = max(self.peak_frontier, size)
         return None
 
-    def astar(self) -> Optional[Node]:
-        """Uses A* algorithm to find the shortest distance"""
-        frontier: PriorityQueue = PriorityQueue()
-        distance = MazeLocation.manhattan_distance(self.goal)
-        frontier.put(Node(self.start, None))
-        explored = {self.start: 0.0}
+    def _manhattan_ids(self, goal: int) -> Callable[[int], int]:
+        width = self._width
+        goal_row, goal_column = divmod(goal, width)
 
-        while not frontier.empty():
-            current_node = frontier.get()
-            current_state = current_node.state
-            if self.goal_test(current_state):
-                return current_node
-            for child in self.successors(current_state):
-                # 1 assumes a grid, need a cost function for more sophisticated apps
-                new_cost = current_node.cost + 1
-                if child not in explored or explored[child] > new_cost:
-                    explored[child] = new_cost
-                    frontier.put(
-                        Node(child, current_node, new_cost, distance(current_state))
+        def distance(cell_id: int) -> int:
+            row, column = divmod(cell_id, width)
+            return abs(column - goal_column) + abs(row - goal_row)
+
+        return distance
+
+    def _node_chain(self, store: NodeStore, end: int) -> Node:
+        """Builds Node objects only for the cells on the path to end."""
+        node: Optional[Node] = None
+        for cell_id in store.path_ids(end):
+            node = Node(self.location(cell_id), node, store.costs[cell_id])
+        assert node is not None
+        return node
+
+    def astar(self, cost: Optional[CostFunction] = None) -> Optional[Node]:
+        """
+        Uses A* algorithm to find the shortest distance.
+        cost(from, to) is the price of a step, 1 by default. The Manhattan
+        heuristic stays admissible only if every step costs at least 1.
+        Ties on f are broken in favour of the higher cost (deeper node)
+        and then by insertion order, so results are deterministic.
+        """
+        start, goal = self.location_id(self.start), self.location_id(self.goal)
+        distance = self._manhattan_ids(goal)
+        store = NodeStore(len(self._grid))
+        store.add(start, NO_PARENT, 0.0)
+        costs = store.costs
+        closed = bytearray(len(self._grid))
+        counter = 0
+        frontier = [(distance(start), -0.0, counter, start)]
+        self.nodes_expanded = self.peak_frontier = 0
+
+        while frontier:
+            self.peak_frontier = max(self.peak_frontier, len(frontier))
+            _, negative_cost, _, current = heappop(frontier)
+            # stale entry, the cell was already expanded with a lower cost
+            if closed[current]:
+                continue
+            if current == goal:
+                return self._node_chain(store, goal)
+            closed[current] = 1
+            self.nodes_expanded += 1
+            for child in self.successor_ids(current):
+                if closed[child]:
+                    continue
+                if cost is None:
+                    new_cost = -negative_cost + 1
+                else:
+                    new_cost = -negative_cost + cost(
+                        self.location(current), self.location(child)
+                    )
+                if new_cost < costs[child]:
+                    store.add(child, current, new_cost)
+                    counter += 1
+                    heappush(
+                        frontier,
+                        (new_cost + distance(child), -new_cost, counter, child),
+                    )
+        return None
+
+    def _path_node(self, ids: List[int]) -> Node:
+        """Node chain of a path given by cell ids from start, every step costs 1."""
+        node: Optional[Node] = None
+        for cost, cell_id in enumerate(ids):
+            node = Node(self.location(cell_id), node, float(cost))
+        assert node is not None
+        return node
+
+    def _jump_horizontal(self, cell_id: int, step: int, goal: int) -> Optional[int]:
+        """
+        Moves by step (±1) until the goal, a blocked cell or a cell with
+        a forced vertical neighbour: open, while the same neighbour
+        of the previous cell is blocked.
+        """
+        grid, width = self._grid, self._width
+        while True:
+            cell_id += step
+            if grid[cell_id] == BLOCKED:
+                return None
+            if cell_id == goal:
+                return cell_id
+            behind = cell_id - step
+            for vertical in (-width, width):
+                if (
+                    grid[cell_id + vertical] != BLOCKED
+                    and grid[behind + vertical] == BLOCKED
+                ):
+                    return cell_id
+
+    def _jump_vertical(self, cell_id: int, step: int, goal: int) -> Optional[int]:
+        """
+        Moves by step (±width) until the goal, a blocked cell or a cell
+        from which a horizontal jump finds a jump point.
+        """
+        grid = self._grid
+        while True:
+            cell_id += step
+            if grid[cell_id] == BLOCKED:
+                return None
+            if cell_id == goal:
+                return cell_id
+            for horizontal in (-1, 1):
+                if self._jump_horizontal(cell_id, horizontal, goal) is not None:
+                    return cell_id
+
+    def _jump(self, cell_id: int, step: int, goal: int) -> Optional[int]:
+        if step in (-1, 1):
+            return self._jump_horizontal(cell_id, step, goal)
+        return self._jump_vertical(cell_id, step, goal)
+
+    def jps(self) -> Optional[Node]:
+        """
+        Jump Point Search for the 4-connected grid. Canonical paths turn
+        from horizontal to vertical only around obstacles, so horizontal
+        moves keep going straight unless a vertical neighbour is forced and
+        vertical moves stop only where a horizontal jump finds something.
+        A* runs over the jump points only, the returned Node chain
+        still has every cell of the path.
+        """
+        start, goal = self.location_id(self.start), self.location_id(self.goal)
+        width = self._width
+        distance = self._manhattan_ids(goal)
+        costs: Dict[int, int] = {start: 0}
+        parents: Dict[int, Tuple[int, int]] = {}
+        closed = set()
+        counter = 0
+        frontier = [(distance(start), 0, counter, start)]
+        self.nodes_expanded = self.peak_frontier = 0
+
+        while frontier:
+            self.peak_frontier = max(self.peak_frontier, len(frontier))
+            _, negative_cost, _, current = heappop(frontier)
+            if current in closed:
+                continue
+            if current == goal:
+                return self._path_node(self._jump_path(parents, goal))
+            closed.add(current)
+            self.nodes_expanded += 1
+            if current in parents:
+                direction = parents[current][1]
+                if direction in (-1, 1):
+                    # straight on plus the forced vertical neighbours
+                    directions = [direction] + [
+                        vertical
+                        for vertical in (-width, width)
+                        if self._grid[current + vertical] != BLOCKED
+                        and self._grid[current - direction + vertical] == BLOCKED
+                    ]
+                else:
+                    directions = [direction, -1, 1]
+            else:
+                directions = self._offsets
+            for direction in directions:
+                child = self._jump(current, direction, goal)
+                if child is None or child in closed:
+                    continue
+                new_cost = -negative_cost + abs(child - current) // abs(direction)
+                if child not in costs or new_cost < costs[child]:
+                    costs[child] = new_cost
+                    parents[child] = (current, direction)
+                    counter += 1
+                    heappush(
+                        frontier,
+                        (new_cost + distance(child), -new_cost, counter, child),
                     )
         return None
 
+    @staticmethod
+    def _jump_path(parents: Dict[int, Tuple[int, int]], end: int) -> List[int]:
+        """Fills in the cells between consecutive jump points."""
+        ids = [end]
+        while ids[-1] in parents:
+            parent, direction = parents[ids[-1]]
+            cell_id = ids[-1]
+            while cell_id != parent:
+                cell_id -= direction
+                ids.append(cell_id)
+        ids.reverse()
+        return ids
+
+    def bidirectional_bfs(self) -> Optional[Node]:
+        """
+        BFS from start and goal at the same time, always growing the
+        smaller frontier by one whole layer. When the searches meet,
+        the meeting cell with the shortest total distance in that layer
+        gives an optimal path.
+        """
+        start, goal = self.location_id(self.start), self.location_id(self.goal)
+        self.nodes_expanded = self.peak_frontier = 0
+        if start == goal:
+            return self._path_node([start])
+        forward: Dict[int, Optional[int]] = {start: None}
+        backward: Dict[int, Optional[int]] = {goal: None}
+        forward_depth: Dict[int, int] = {start: 0}
+        backward_depth: Dict[int, int] = {goal: 0}
+        forward_layer, backward_layer = [start], [goal]
+
+        while forward_layer and backward_layer:
+            self.peak_frontier = max(
+                self.peak_frontier, len(forward_layer) + len(backward_layer)
+            )
+            if len(forward_layer) <= len(backward_layer):
+                layer, parents, depth = forward_layer, forward, forward_depth
+                other, other_depth = backward, backward_depth
+            else:
+                layer, parents, depth = backward_layer, backward, backward_depth
+                other, other_depth = forward, forward_depth
+            next_layer: List[int] = []
+            best: Optional[Tuple[int, int]] = None
+            for current in layer:
+                self.nodes_expanded += 1
+                for child in self.successor_ids(current):
+                    if child in parents:
+                        continue
+                    parents[child] = current
+                    depth[child] = depth[current] + 1
+                    next_layer.append(child)
+                    if child in other:
+                        total = depth[child] + other_depth[child]
+                        if best is None or total < best[0]:
+                            best = (total, child)
+            if best is not None:
+                meeting = best[1]
+                ids: List[int] = []
+                cell_id: Optional[int] = meeting
+                while cell_id is not None:
+                    ids.append(cell_id)
+                    cell_id = forward[cell_id]
+                ids.reverse()
+                cell_id = backward[meeting]
+                while cell_id is not None:
+                    ids.append(cell_id)
+                    cell_id = backward[cell_id]
+                return self._path_node(ids)
+            if layer is forward_layer:
+                forward_layer = next_layer
+            else:
+                backward_layer = next_layer
+        return None
+
     @staticmethod
     def node_to_path(node: Node) -> List[MazeLocation]:
         path = [node.state]
@@ -177,6 +646,383 @@ def print_solution(maze: Maze) -> Callable[[Optional[Node]], None]:
     return printer
 
 
+class LpaStar:
+    """
+    Lifelong Planning A* on the maze grid. g is the current cost estimate
+    of a cell, rhs the one step lookahead from its neighbours, cells where
+    they differ are queued. Edits only make the touched cells and their
+    neighbours inconsistent, plan() then fixes just what they affect.
+    """
+
+    def __init__(self, maze: Maze, start: int, goal: int) -> None:
+        self.maze = maze
+        self.start = start
+        self.goal = goal
+        self.heuristic = maze._manhattan_ids(goal)
+        self.g: Dict[int, float] = {}
+        self.rhs: Dict[int, float] = {start: 0.0}
+        # heap with lazy deletion, queued holds the current key of every cell
+        self.heap: List[Tuple[float, float, int, int]] = []
+        self.queued: Dict[int, Tuple[float, float]] = {}
+        self.counter = 0
+        # cells blocked or freed since the last plan()
+        self.changed: Set[int] = set()
+        self._push(start)
+
+    def _key(self, cell_id: int) -> Tuple[float, float]:
+        best = min(self.g.get(cell_id, INFINITY), self.rhs.get(cell_id, INFINITY))
+        return best + self.heuristic(cell_id), best
+
+    def _push(self, cell_id: int) -> None:
+        key = self._key(cell_id)
+        self.queued[cell_id] = key
+        self.counter += 1
+        heappush(self.heap, (key[0], key[1], self.counter, cell_id))
+
+    def _top_key(self) -> Tuple[float, float]:
+        while self.heap:
+            k1, k2, _, cell_id = self.heap[0]
+            if self.queued.get(cell_id) == (k1, k2):
+                return k1, k2
+            heappop(self.heap)
+        return INFINITY, INFINITY
+
+    def _update(self, cell_id: int) -> None:
+        grid = self.maze._grid
+        if cell_id != self.start:
+            if grid[cell_id] == BLOCKED:
+                self.rhs[cell_id] = INFINITY
+            else:
+                g = self.g
+                self.rhs[cell_id] = min(
+                    (g.get(n, INFINITY) + 1 for n in self.maze.successor_ids(cell_id)),
+                    default=INFINITY,
+                )
+        self.queued.pop(cell_id, None)
+        if self.g.get(cell_id, INFINITY) != self.rhs.get(cell_id, INFINITY):
+            self._push(cell_id)
+
+    def plan(self) -> Optional[Node]:
+        maze = self.maze
+        for cell_id in self.changed:
+            self._update(cell_id)
+            for offset in maze._offsets:
+                self._update(cell_id + offset)
+        self.changed.clear()
+        maze.nodes_expanded = 0
+        g, rhs = self.g, self.rhs
+        while (
+            self._top_key() < self._key(self.goal)
+            or rhs.get(self.goal, INFINITY) != g.get(self.goal, INFINITY)
+        ):
+            if not self.heap:
+                break
+            _, _, _, current = heappop(self.heap)
+            del self.queued[current]
+            maze.nodes_expanded += 1
+            if g.get(current, INFINITY) > rhs.get(current, INFINITY):
+                g[current] = rhs[current]
+            else:
+                g[current] = INFINITY
+                self._update(current)
+            for child in maze.successor_ids(current):
+                self._update(child)
+        return self._path()
+
+    def _path(self) -> Optional[Node]:
+        """Walks back from the goal along neighbours with the lowest g."""
+        g = self.g
+        if g.get(self.goal, INFINITY) == INFINITY:
+            return None
+        ids = [self.goal]
+        while ids[-1] != self.start:
+            ids.append(
+                min(self.maze.successor_ids(ids[-1]), key=lambda n: g.get(n, INFINITY))
+            )
+        ids.reverse()
+        return self.maze._path_node(ids)
+
+
+def _astar_priority_queue(maze: Maze) -> Tuple[Optional[Node], int]:
+    """The original Maze.astar, kept for benchmark comparison."""
+    frontier: PriorityQueue = PriorityQueue()
+    distance = MazeLocation.manhattan_distance(maze.goal)
+    frontier.put(Node(maze.start, None))
+    explored = {maze.start: 0.0}
+    expanded = 0
+
+    while not frontier.empty():
+        current_node = frontier.get()
+        current_state = current_node.state
+        if maze.goal_test(current_state):
+            return current_node, expanded
+        expanded += 1
+        for child in maze.successors(current_state):
+            new_cost = current_node.cost + 1
+            if child not in explored or explored[child] > new_cost:
+                explored[child] = new_cost
+                frontier.put(
+                    Node(child, current_node, new_cost, distance(current_state))
+                )
+    return None, expanded
+
+
+def benchmark_astar(sizes: Tuple[int, ...] = (100, 200, 400)) -> None:
+    for size in sizes:
+        seed(size)
+        maze = Maze(size, size, goal=MazeLocation(size - 1, size - 1))
+        t = timeit.timeit(lambda: _astar_priority_queue(maze), number=1)
+        _, expanded = _astar_priority_queue(maze)
+        print(f"{size}x{size} PriorityQueue A*: {expanded} expanded, took {t:.6f}")
+        t = timeit.timeit(maze.astar, number=1)
+        print(f"{size}x{size} heapq A*: {maze.nodes_expanded} expanded, took {t:.6f}")
+
+
+def benchmark_open_maze(sizes: Tuple[int, ...] = (250, 500, 1000)) -> None:
+    for size in sizes:
+        seed(size)
+        maze = Maze(size, size, goal=MazeLocation(size - 1, size - 1))
+        for name, solver in [
+            ("BFS", lambda: maze.calculate(Queue())),
+            ("A*", maze.astar),
+            ("JPS", maze.jps),
+            ("bidirectional BFS", maze.bidirectional_bfs),
+        ]:
+            t = timeit.timeit(solver, number=1)
+            solution = solver()
+            length = len(Maze.node_to_path(solution)) if solution else 0
+            print(
+                f"{size}x{size} {name}: path length {length}, "
+                f"{maze.nodes_expanded} expanded, took {t:.6f}"
+            )
+
+
+def benchmark_replan(sizes: Tuple[int, ...] = (100, 200, 400), edits: int = 10) -> None:
+    for size in sizes:
+        seed(size)
+        maze = Maze(size, size, goal=MazeLocation(size - 1, size - 1))
+        maze.replan()
+        replan_time = astar_time = 0.0
+        for _ in range(edits):
+            ml = MazeLocation(randrange(size), randrange(size))
+            if ml in (maze.start, maze.goal):
+                continue
+            blocked = maze._grid[maze.location_id(ml)] == BLOCKED
+            maze.set_cell(ml, Cell.EMPTY if blocked else Cell.BLOCKED)
+            replan_time += timeit.timeit(maze.replan, number=1)
+            astar_time += timeit.timeit(maze.astar, number=1)
+        print(
+            f"{size}x{size} {edits} edits: replan took {replan_time:.6f}, "
+            f"full A* took {astar_time:.6f}"
+        )
+
+
+def benchmark_generation(size: int = 4000) -> None:
+    t = timeit.timeit(lambda: Maze(size, size, random_seed=1), number=1)
+    print(f"{size}x{size} maze generation took: {t:.6f}")
+
+
+class Test(unittest.TestCase):
+    def test_ids(self):
+        maze = Maze(4, 7, sparseness=0.0, goal=MazeLocation(3, 6))
+        for row in range(4):
+            for column in range(7):
+                ml = MazeLocation(row, column)
+                self.assertEqual(maze.location(maze.location_id(ml)), ml)
+
+    def test_outside_locations(self):
+        with self.assertRaises(ValueError):
+            Maze(20, 5, 0.0)
+        with self.assertRaises(ValueError):
+            Maze(5, 5, 0.0, start=MazeLocation(-1, 0), goal=MazeLocation(4, 4))
+        maze = Maze(5, 5, 0.0, goal=MazeLocation(4, 4))
+        with self.assertRaises(ValueError):
+            maze.path_from(MazeLocation(0, 5))
+
+    def test_successors(self):
+        maze = Maze(3, 3, sparseness=0.0, goal=MazeLocation(2, 2))
+        self.assertListEqual(
+            maze.successors(MazeLocation(0, 0)),
+            [MazeLocation(0, 1), MazeLocation(1, 0)],
+        )
+        self.assertEqual(len(maze.successors(MazeLocation(1, 1))), 4)
+        maze.mark([MazeLocation(0, 1)], Cell.BLOCKED)
+        self.assertListEqual(maze.successors(MazeLocation(0, 0)), [MazeLocation(1, 0)])
+        self.assertEqual(repr(maze), "S# \n   \n  G")
+
+    def test_calculate(self):
+        maze = Maze(10, 10, sparseness=0.0)
+        bfs = maze.calculate(Queue())
+        self.assertIsNotNone(bfs)
+        self.assertEqual(len(Maze.node_to_path(bfs)), 19)
+        dfs = maze.calculate(LifoQueue())
+        self.assertEqual(Maze.node_to_path(dfs)[-1], maze.goal)
+
+    def test_node_store(self):
+        store = NodeStore(5)
+        store.add(3, NO_PARENT)
+        store.add(1, 3, 1.0)
+        store.add(4, 1, 2.0)
+        self.assertListEqual(store.path_ids(4), [3, 1, 4])
+        self.assertEqual(store.costs[4], 2.0)
+        self.assertFalse(hasattr(Node(MazeLocation(0, 0), None), "__dict__"))
+
+    def test_search_stats(self):
+        maze = Maze(10, 10, sparseness=0.0)
+        maze.calculate(Queue())
+        # BFS frontier on an open grid is at most one diagonal long
+        self.assertEqual(maze.peak_frontier, 10)
+        self.assertEqual(maze.nodes_expanded, 99)
+        maze.astar()
+        self.assertLess(0, maze.peak_frontier)
+        self.assertEqual(maze.nodes_expanded, 18)
+
+    def test_astar(self):
+        for i in range(20):
+            seed(i)
+            maze = Maze()
+            bfs = maze.calculate(Queue())
+            astar = maze.astar()
+            with self.subTest(seed=i):
+                if bfs is None:
+                    self.assertIsNone(astar)
+                    continue
+                path = Maze.node_to_path(astar)
+                self.assertEqual(len(path), len(Maze.node_to_path(bfs)))
+                self.assertEqual(path[0], maze.start)
+                self.assertEqual(path[-1], maze.goal)
+                self.assertEqual(astar.cost, len(path) - 1)
+
+    def test_astar_cost(self):
+        maze = Maze(3, 3, sparseness=0.0, goal=MazeLocation(2, 2))
+
+        # stepping on the middle column is expensive
+        def cost(_: MazeLocation, to: MazeLocation) -> float:
+            return 10.0 if to.column == 1 and to.row < 2 else 1.0
+
+        path = Maze.node_to_path(maze.astar(cost))
+        self.assertListEqual(
+            path,
+            [
+                MazeLocation(0, 0),
+                MazeLocation(1, 0),
+                MazeLocation(2, 0),
+                MazeLocation(2, 1),
+                MazeLocation(2, 2),
+            ],
+        )
+
+    def test_jps_and_bidirectional_bfs(self):
+        for i in range(100):
+            seed(i)
+            maze = Maze(15, 20, sparseness=0.3, goal=MazeLocation(14, 19))
+            bfs = maze.calculate(Queue())
+            for solver in [maze.jps, maze.bidirectional_bfs]:
+                solution = solver()
+                with self.subTest(seed=i, solver=solver.__name__):
+                    if bfs is None:
+                        self.assertIsNone(solution)
+                        continue
+                    path = Maze.node_to_path(solution)
+                    self.assertEqual(len(path), len(Maze.node_to_path(bfs)))
+                    self.assertEqual(path[0], maze.start)
+                    self.assertEqual(path[-1], maze.goal)
+                    for a, b in zip(path, path[1:]):
+                        self.assertIn(b, maze.successors(a))
+
+    def test_path_from(self):
+        seed(3)
+        maze = Maze(20, 20, sparseness=0.3, goal=MazeLocation(19, 19))
+        for row in range(20):
+            for column in range(20):
+                start = MazeLocation(row, column)
+                expected = Maze(20, 20, 0.0, start, maze.goal)
+                expected._grid = maze._grid
+                bfs = expected.calculate(Queue())
+                solution = maze.path_from(start)
+                with self.subTest(start=start):
+                    if bfs is None or not maze._is_valid_point(start):
+                        self.assertIsNone(solution)
+                        continue
+                    path = Maze.node_to_path(solution)
+                    self.assertEqual(len(path), len(Maze.node_to_path(bfs)))
+                    self.assertEqual(path[0], start)
+                    self.assertEqual(path[-1], maze.goal)
+        info = maze.field_cache_info()
+        self.assertEqual((info.hits, info.misses), (399, 1))
+        self.assertAlmostEqual(info.hit_rate, 399 / 400)
+
+    def test_field_invalidation(self):
+        maze = Maze(3, 3, sparseness=0.0, goal=MazeLocation(2, 2))
+        self.assertEqual(len(Maze.node_to_path(maze.path_from(MazeLocation(0, 2)))), 3)
+        # marking a path doesn't change passability
+        maze.mark([MazeLocation(1, 1)], Cell.PATH)
+        maze.path_from(MazeLocation(0, 2))
+        self.assertEqual(maze.field_cache_info().misses, 1)
+        maze.set_cell(MazeLocation(1, 2), Cell.BLOCKED)
+        path = Maze.node_to_path(maze.path_from(MazeLocation(0, 2)))
+        self.assertEqual(len(path), 5)
+        self.assertEqual(maze.field_cache_info().misses, 2)
+        maze.mark([MazeLocation(1, 2)], Cell.EMPTY)
+        self.assertEqual(len(Maze.node_to_path(maze.path_from(MazeLocation(0, 2)))), 3)
+        self.assertEqual(maze.field_cache_info().misses, 3)
+
+    def test_replan(self):
+        seed(5)
+        maze = Maze(15, 15, sparseness=0.25, goal=MazeLocation(14, 14))
+        for i in range(200):
+            if i:
+                ml = MazeLocation(randrange(15), randrange(15))
+                if ml in (maze.start, maze.goal):
+                    continue
+                blocked = maze._grid[maze.location_id(ml)] == BLOCKED
+                maze.set_cell(ml, Cell.EMPTY if blocked else Cell.BLOCKED)
+            expected = maze.astar()
+            solution = maze.replan()
+            with self.subTest(edit=i):
+                if expected is None:
+                    self.assertIsNone(solution)
+                    continue
+                path = Maze.node_to_path(solution)
+                self.assertEqual(len(path), len(Maze.node_to_path(expected)))
+                self.assertEqual(path[0], maze.start)
+                self.assertEqual(path[-1], maze.goal)
+                for a, b in zip(path, path[1:]):
+                    self.assertIn(b, maze.successors(a))
+
+    def test_seeded_generation(self):
+        first = Maze(50, 60, 0.3, random_seed=42)
+        self.assertEqual(repr(first), repr(Maze(50, 60, 0.3, random_seed=42)))
+        self.assertNotEqual(repr(first), repr(Maze(50, 60, 0.3, random_seed=43)))
+        blocked = repr(first).count(Cell.BLOCKED.value) / (50 * 60)
+        self.assertAlmostEqual(blocked, 0.3, delta=0.05)
+        blocked_maze = Maze(3, 3, 1.0, goal=MazeLocation(2, 2))
+        self.assertEqual(repr(blocked_maze), "S##\n###\n##G")
+
+    def test_map_files(self):
+        maze = Maze(20, 30, 0.3, goal=MazeLocation(19, 29), random_seed=7)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "maze.map")
+            maze.write_map(path)
+            loaded = Maze.load_map(path)
+            with open(path) as f:
+                header = f.read().splitlines()[:4]
+        self.assertListEqual(header, ["type octile", "height 20", "width 30", "map"])
+        self.assertEqual(repr(loaded), repr(maze))
+        self.assertEqual(loaded.goal, MazeLocation(19, 29))
+
+    def test_load_movingai_map(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "small.map")
+            with open(path, "w") as f:
+                f.write("type octile\r\nheight 2\r\nwidth 4\r\nmap\r\n")
+                f.write(".@TS\r\nG.W.\r\n")
+            maze = Maze.load_map(path, goal=MazeLocation(1, 3))
+            with self.assertRaises(ValueError):
+                Maze.load_map(path, goal=MazeLocation(2, 0))
+        self.assertEqual(repr(maze), "S## \n  #G")
+
+
 if __name__ == "__main__":
     maze = Maze()
     printer = print_solution(maze)
@@ -195,3 +1041,8 @@ if __name__ == "__main__":
     solution3 = maze.astar()
     print("A*")
     printer(solution3)
+
+    benchmark_astar()
+    benchmark_open_maze()
+    benchmark_replan()
+    benchmark_generation()
@@ -0,0 +1,196 @@
+"""
+Benchmark of the Maze solvers on many seeded random mazes.
+
+Every maze is rebuilt from its (size, sparseness, seed) in a worker process,
+so runs are reproducible and can be compared with each other:
+
+    python maze_benchmark.py --output new.json --compare old.json
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from queue import LifoQueue, Queue
+from statistics import mean
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from maze import Maze, MazeLocation, Node
+
+SIZES = (10, 50, 100)
+SPARSENESS = (0.1, 0.2, 0.3)
+SEEDS = 100
+# a solver is a regression if its mean wall time grows more than this
+TIME_TOLERANCE = 0.2
+
+SOLVERS: Dict[str, Callable[[Maze], Optional[Node]]] = {
+    "DFS": lambda maze: maze.calculate(LifoQueue()),
+    "BFS": lambda maze: maze.calculate(Queue()),
+    "A*": lambda maze: maze.astar(),
+    "JPS": lambda maze: maze.jps(),
+    "bidirectional BFS": lambda maze: maze.bidirectional_bfs(),
+}
+
+
+class Task(NamedTuple):
+    size: int
+    sparseness: float
+    seed: int
+
+
+def run_task(task: Task) -> List[Dict[str, Any]]:
+    """Solves one seeded maze with every solver."""
+    results = []
+    for name, solver in SOLVERS.items():
+        maze = Maze(
+            task.size,
+            task.size,
+            task.sparseness,
+            goal=MazeLocation(task.size - 1, task.size - 1),
+            random_seed=task.seed,
+        )
+        started = time.perf_counter()
+        solution = solver(maze)
+        elapsed = time.perf_counter() - started
+        results.append(
+            {
+                **task._asdict(),
+                "solver": name,
+                "nodes_expanded": maze.nodes_expanded,
+                "peak_frontier": maze.peak_frontier,
+                "path_length": len(Maze.node_to_path(solution)) if solution else 0,
+                "time": elapsed,
+            }
+        )
+    return results
+
+
+def run(
+    sizes: Iterable[int] = SIZES,
+    sparseness: Iterable[float] = SPARSENESS,
+    seeds: int = SEEDS,
+    workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    tasks = [Task(*args) for args in product(sizes, sparseness, range(seeds))]
+    chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(workers) as executor:
+        return [
+            result
+            for results in executor.map(run_task, tasks, chunksize=chunksize)
+            for result in results
+        ]
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """Means per solver, size and sparseness, keyed by "solver/size/sparseness"."""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for result in results:
+        key = f"{result['solver']}/{result['size']}/{result['sparseness']}"
+        groups.setdefault(key, []).append(result)
+    return {
+        key: {
+            field: mean(r[field] for r in group)
+            for field in ["nodes_expanded", "peak_frontier", "path_length", "time"]
+        }
+        for key, group in sorted(groups.items())
+    }
+
+
+def compare(
+    old: Dict[str, Dict[str, float]],
+    new: Dict[str, Dict[str, float]],
+    tolerance: float = TIME_TOLERANCE,
+) -> List[str]:
+    """
+    Regressions between two summaries: changed path lengths, more nodes
+    expanded, or mean time grown by more than tolerance.
+    """
+    regressions = []
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key], new[key]
+        if after["path_length"] != before["path_length"]:
+            regressions.append(
+                f"{key}: path length {before['path_length']} -> {after['path_length']}"
+            )
+        if after["nodes_expanded"] > before["nodes_expanded"]:
+            regressions.append(
+                f"{key}: nodes expanded "
+                f"{before['nodes_expanded']} -> {after['nodes_expanded']}"
+            )
+        if after["time"] > before["time"] * (1 + tolerance):
+            regressions.append(
+                f"{key}: time {before['time']:.6f} -> {after['time']:.6f}"
+            )
+    return regressions
+
+
+def write(path: str, results: List[Dict[str, Any]]) -> None:
+    with open(path, "w") as f:
+        json.dump({"summary": summarize(results), "results": results}, f, indent=1)
+
+
+def read_summary(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path) as f:
+        return json.load(f)["summary"]
+
+
+class Test(unittest.TestCase):
+    def test_run_task(self):
+        results = run_task(Task(10, 0.0, 1))
+        self.assertListEqual([r["solver"] for r in results], list(SOLVERS))
+        for result in results:
+            self.assertLess(0, result["nodes_expanded"])
+            self.assertLess(0, result["peak_frontier"])
+        shortest = [r["path_length"] for r in results if r["solver"] != "DFS"]
+        self.assertListEqual(shortest, [19] * 4)
+
+    def test_reproducible(self):
+        first = run_task(Task(20, 0.3, 7))
+        second = run_task(Task(20, 0.3, 7))
+        for a, b in zip(first, second):
+            self.assertEqual(a["nodes_expanded"], b["nodes_expanded"])
+            self.assertEqual(a["path_length"], b["path_length"])
+
+    def test_run_and_compare(self):
+        results = run([10], [0.2], seeds=3, workers=2)
+        self.assertEqual(len(results), 3 * len(SOLVERS))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.json")
+            write(path, results)
+            summary = read_summary(path)
+        self.assertListEqual(compare(summary, summary), [])
+        slower = {k: {**v, "time": v["time"] * 2 + 1} for k, v in summary.items()}
+        self.assertEqual(len(compare(summary, slower)), len(summary))
+
+
+def main(args: Optional[List[str]] = None) -> Tuple[int, List[str]]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--sparseness", type=float, nargs="+", default=SPARSENESS)
+    parser.add_argument("--seeds", type=int, default=SEEDS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="maze_benchmark.json")
+    parser.add_argument("--compare", help="earlier results to check against")
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE)
+    options = parser.parse_args(args)
+
+    results = run(options.sizes, options.sparseness, options.seeds, options.workers)
+    write(options.output, results)
+    for key, means in summarize(results).items():
+        print(key, ", ".join(f"{k}: {v:.6g}" for k, v in means.items()))
+    regressions: List[str] = []
+    if options.compare:
+        old, new = read_summary(options.compare), read_summary(options.output)
+        regressions = compare(old, new, options.tolerance)
+        print("\n".join(regressions) or "No regressions")
+    return len(results), regressions
+
+
+if __name__ == "__main__":
+    _, regressions = main()
+    raise SystemExit(1 if regressions else 0)
@@ -12,18 +12,47 @@ What sequence of crossings will successfully take the entire party across the ri
 """
 
 from __future__ import annotations
-from typing import List, Optional
+from array import array
+from collections import deque
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
 from queue import Queue
+import timeit
+import unittest
 
 MAX_NUM: int = 3
+NO_PARENT = -1
+# number of distinct states: west bank missionaries, cannibals and the boat
+STATES_COUNT = (MAX_NUM + 1) * (MAX_NUM + 1) * 2
+# a boat of four can take any number of pairs across
+BOAT_CAPACITY = 4
+SIZES = (10, 100, 1000)
 
 
 class Node:
+    __slots__ = ("state", "parent")
+
     def __init__(self, state: MCState, parent: Optional[Node]):
         self.state = state
         self.parent = parent
 
 
+class BankState(NamedTuple):
+    wm: int  # west bank missionaries
+    wc: int  # west bank cannibals
+    boat: bool  # True if the boat is on the west bank
+
+
+class Transitions(NamedTuple):
+    """
+    children[state_id] are ids of the states reachable with one crossing,
+    empty for illegal states. A state id is (wm * (n + 1) + wc) * 2 + boat.
+    """
+
+    n: int
+    children: Tuple[Tuple[int, ...], ...]
+
+
 class MCState:
     def __init__(self, missionaries: int, cannibals: int, boat: bool) -> None:
         self.wm: int = missionaries  # west bank missionaries
@@ -32,6 +61,17 @@ class MCState:
         self.ec: int = MAX_NUM - self.wc  # east bank cannibals
         self.boat: bool = boat
 
+    @property
+    def state_id(self) -> int:
+        """Integer id of the state, between 0 and STATES_COUNT"""
+        return (self.wm * (MAX_NUM + 1) + self.wc) * 2 + self.boat
+
+    @staticmethod
+    def from_id(state_id: int) -> MCState:
+        rest, boat = divmod(state_id, 2)
+        wm, wc = divmod(rest, MAX_NUM + 1)
+        return MCState(wm, wc, bool(boat))
+
     def __hash__(self):
         return hash((self.wm, self.wc, self.em, self.ec, self.boat))
 
@@ -96,23 +136,40 @@ class MCState:
         return [x for x in sucs if x.is_legal]
 
     def bfs(self) -> Optional[Node]:
-        """Uses BFS to find solution"""
+        """
+        Uses BFS to find solution. Parents are kept in an array indexed
+        by state id, Node objects are built only for the solution path.
+        """
         frontier: Queue = Queue()
-        frontier.put(Node(self, None))
-        explored = {self}
+        frontier.put(self)
+        parents = array("l", [NO_PARENT]) * STATES_COUNT
+        explored = bytearray(STATES_COUNT)
+        explored[self.state_id] = 1
 
         while not frontier.empty():
-            current_node = frontier.get()
-            current_state = current_node.state
+            current_state = frontier.get()
             if MCState.goal_test(current_state):
-                return current_node
+                return MCState._node_chain(parents, current_state.state_id)
             for child in MCState.successors(current_state):
-                if child in explored:
+                child_id = child.state_id
+                if explored[child_id]:
                     continue
-                explored.add(child)
-                frontier.put(Node(child, current_node))
+                explored[child_id] = 1
+                parents[child_id] = current_state.state_id
+                frontier.put(child)
         return None
 
+    @staticmethod
+    def _node_chain(parents: array, end: int) -> Node:
+        ids = [end]
+        while parents[ids[-1]] != NO_PARENT:
+            ids.append(parents[ids[-1]])
+        node: Optional[Node] = None
+        for state_id in reversed(ids):
+            node = Node(MCState.from_id(state_id), node)
+        assert node is not None
+        return node
+
     @staticmethod
     def display_solution(solution) -> None:
         path = MCState.node_to_path(solution)
@@ -149,6 +206,127 @@ class MCState:
         return path
 
 
+def boat_loads(capacity: int) -> List[Tuple[int, int]]:
+    """All (missionaries, cannibals) the boat can carry, at least one person."""
+    return [
+        (m, c)
+        for m in range(capacity + 1)
+        for c in range(capacity + 1 - m)
+        if 0 < m + c
+    ]
+
+
+@lru_cache(maxsize=None)
+def transitions(n: int, capacity: int) -> Transitions:
+    """
+    Legal crossings between legal states for n missionaries, n cannibals
+    and a boat of capacity, computed once per (n, capacity).
+    """
+    safe = lambda m, c: m == 0 or c <= m
+    loads = boat_loads(capacity)
+    children: List[Tuple[int, ...]] = [()] * ((n + 1) * (n + 1) * 2)
+    for wm in range(n + 1):
+        for wc in range(n + 1):
+            # only O(n) states have both banks safe
+            if not (safe(wm, wc) and safe(n - wm, n - wc)):
+                continue
+            for boat in (0, 1):
+                # the boat takes people away from the bank it is on
+                sign = -1 if boat else 1
+                ids = []
+                for m, c in loads:
+                    cm, cc = wm + sign * m, wc + sign * c
+                    if not (0 <= cm <= n and 0 <= cc <= n):
+                        continue
+                    if safe(cm, cc) and safe(n - cm, n - cc):
+                        ids.append((cm * (n + 1) + cc) * 2 + 1 - boat)
+                children[(wm * (n + 1) + wc) * 2 + boat] = tuple(ids)
+    return Transitions(n, tuple(children))
+
+
+def solve(n: int, capacity: int = 2) -> Optional[List[BankState]]:
+    """
+    Fewest crossings for n missionaries and n cannibals with a boat
+    of capacity, None if there is no solution.
+    Visited states are a bytearray indexed by state id.
+    """
+    children = transitions(n, capacity).children
+    start, goal = (n * (n + 1) + n) * 2 + 1, 0
+    parents = array("l", [NO_PARENT]) * len(children)
+    visited = bytearray(len(children))
+    visited[start] = 1
+    frontier = deque([start])
+    while frontier:
+        current = frontier.popleft()
+        if current == goal:
+            ids = [current]
+            while parents[ids[-1]] != NO_PARENT:
+                ids.append(parents[ids[-1]])
+            return [_bank_state(n, state_id) for state_id in reversed(ids)]
+        for child in children[current]:
+            if not visited[child]:
+                visited[child] = 1
+                parents[child] = current
+                frontier.append(child)
+    return None
+
+
+def _bank_state(n: int, state_id: int) -> BankState:
+    rest, boat = divmod(state_id, 2)
+    wm, wc = divmod(rest, n + 1)
+    return BankState(wm, wc, bool(boat))
+
+
+def benchmark(sizes: Tuple[int, ...] = SIZES, capacity: int = BOAT_CAPACITY) -> None:
+    for n in sizes:
+        first = timeit.timeit(lambda: solve(n, capacity), number=1)
+        cached = timeit.timeit(lambda: solve(n, capacity), number=1)
+        solution = solve(n, capacity)
+        crossings = len(solution) - 1 if solution else None
+        print(
+            f"solve({n}, {capacity}) crossings: {crossings}, "
+            f"took: {first:.6f}, with cached transitions: {cached:.6f}"
+        )
+
+
+class Test(unittest.TestCase):
+    def assertValid(self, n: int, capacity: int, path: List[BankState]) -> None:
+        self.assertEqual(path[0], BankState(n, n, True))
+        self.assertEqual(path[-1], BankState(0, 0, False))
+        for old, new in zip(path, path[1:]):
+            self.assertNotEqual(old.boat, new.boat)
+            m, c = abs(old.wm - new.wm), abs(old.wc - new.wc)
+            self.assertTrue(0 < m + c <= capacity)
+            for state in (new, BankState(n - new.wm, n - new.wc, new.boat)):
+                self.assertTrue(state.wm == 0 or state.wc <= state.wm)
+
+    def test_classic(self):
+        path = solve(MAX_NUM, 2)
+        assert path is not None
+        self.assertValid(MAX_NUM, 2, path)
+        solution = MCState(MAX_NUM, MAX_NUM, True).bfs()
+        assert solution is not None
+        self.assertEqual(len(path), len(MCState.node_to_path(solution)))
+        self.assertEqual(len(path) - 1, 11)
+
+    def test_unsolvable(self):
+        self.assertIsNone(solve(4, 2))
+        self.assertIsNone(solve(6, 3))
+        self.assertIsNotNone(solve(5, 3))
+
+    def test_large(self):
+        for n in (1, 10, 200):
+            path = solve(n, BOAT_CAPACITY)
+            assert path is not None
+            with self.subTest(n=n):
+                self.assertValid(n, BOAT_CAPACITY, path)
+
+    def test_boat_loads(self):
+        self.assertListEqual(
+            sorted(boat_loads(2)), [(0, 1), (0, 2), (1, 0), (1, 1), (2, 0)]
+        )
+
+
 if __name__ == "__main__":
     mc = MCState(MAX_NUM, MAX_NUM, True)
     solution = mc.bfs()
@@ -156,3 +334,5 @@ if __name__ == "__main__":
         print("No solution found")
     else:
         MCState.display_solution(solution)
+    benchmark()
+    unittest.main()